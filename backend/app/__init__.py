@@ -3,18 +3,57 @@ Flask Application Factory
 Creates and configures the Flask application with all extensions and blueprints
 """
 import os
+import atexit
 import logging
-from logging.handlers import RotatingFileHandler
+import queue
+from importlib import import_module
+from logging.handlers import (RotatingFileHandler, WatchedFileHandler,
+                              QueueHandler, QueueListener)
+import json
 from dotenv import load_dotenv
-from flask import Flask, jsonify
+from flask import Flask, Response, jsonify, request
+from flask.json.provider import JSONProvider
 from app.config import get_config
 from app.extensions import init_extensions, db, jwt
-from app.api import auth_bp, servers_bp, playbooks_bp, jobs_bp, users_bp
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional speedup
+    orjson = None
 
 # Load environment variables from .env file
 load_dotenv()
 
 
+class OrjsonJSONProvider(JSONProvider):
+    """
+    JSON provider backed by orjson
+
+    Serializes jsonify responses with orjson, which emits UTF-8 bytes
+    directly and is significantly faster than the stdlib encoder.
+    Unknown types (e.g. Decimal) fall back to str, matching the
+    stdlib provider's behaviour for datetimes closely enough for our
+    API payloads.
+    """
+
+    def dumps(self, obj, **kwargs):
+        return orjson.dumps(obj, default=str).decode('utf-8')
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+# Blueprints are referenced by dotted path so their modules (and the
+# schemas/services they pull in) are only imported when the app factory
+# actually registers them, keeping `import app` cheap for CLI and workers
+BLUEPRINTS = [
+    ('app.api.auth', 'auth_bp'),
+    ('app.api.servers', 'servers_bp'),
+    ('app.api.playbooks', 'playbooks_bp'),
+    ('app.api.jobs', 'jobs_bp'),
+    ('app.api.users', 'users_bp'),
+]
+
+
 def create_app(config_name=None):
     """
     Application factory pattern
@@ -34,10 +73,27 @@ def create_app(config_name=None):
     
     config = get_config(config_name)
     app.config.from_object(config)
-    
+
+    # Use orjson for response serialization when available
+    if orjson is not None:
+        app.json = OrjsonJSONProvider(app)
+
     # Initialize extensions
     init_extensions(app)
-    
+
+    # Start the background audit writer; tests keep audit writes
+    # synchronous so assertions see the rows immediately
+    if not app.testing:
+        from app.services.audit_service import audit_writer
+        audit_writer.start(app)
+
+    # Answer CORS preflights before routing/auth runs; Flask-CORS
+    # attaches the Access-Control-* headers in after_request
+    @app.before_request
+    def short_circuit_preflight():
+        if request.method == 'OPTIONS':
+            return '', 204
+
     # Register blueprints
     register_blueprints(app)
     
@@ -53,31 +109,36 @@ def create_app(config_name=None):
     # Register CLI commands
     register_cli_commands(app)
     
+    # These payloads are fixed once the app is configured, so serialize
+    # them a single time; load balancers hit /health continuously
+    health_body = app.json.dumps({
+        'status': 'healthy',
+        'environment': config_name,
+        'version': '1.0.0'
+    })
+    index_body = app.json.dumps({
+        'message': 'Infra Automation Platform API',
+        'version': '1.0.0',
+        'endpoints': {
+            'auth': '/auth',
+            'servers': '/servers',
+            'playbooks': '/playbooks',
+            'jobs': '/jobs',
+            'users': '/users'
+        }
+    })
+
     # Health check endpoint
     @app.route('/health', methods=['GET'])
     def health_check():
         """Health check endpoint"""
-        return jsonify({
-            'status': 'healthy',
-            'environment': config_name,
-            'version': '1.0.0'
-        }), 200
-    
+        return Response(health_body, status=200, mimetype='application/json')
+
     @app.route('/', methods=['GET'])
     def index():
         """Root endpoint"""
-        return jsonify({
-            'message': 'Infra Automation Platform API',
-            'version': '1.0.0',
-            'endpoints': {
-                'auth': '/auth',
-                'servers': '/servers',
-                'playbooks': '/playbooks',
-                'jobs': '/jobs',
-                'users': '/users'
-            }
-        }), 200
-    
+        return Response(index_body, status=200, mimetype='application/json')
+
     return app
 
 
@@ -88,49 +149,58 @@ def register_blueprints(app):
     Args:
         app: Flask application instance
     """
-    app.register_blueprint(auth_bp)
-    app.register_blueprint(servers_bp)
-    app.register_blueprint(playbooks_bp)
-    app.register_blueprint(jobs_bp)
-    app.register_blueprint(users_bp)
+    for module_path, blueprint_name in BLUEPRINTS:
+        module = import_module(module_path)
+        app.register_blueprint(getattr(module, blueprint_name))
+
+
+def _error_body(error, message):
+    """Serialize a fixed error payload to bytes once, at import time"""
+    payload = {'error': error, 'message': message}
+    if orjson is not None:
+        return orjson.dumps(payload)
+    return json.dumps(payload).encode('utf-8')
+
+
+# Error payloads never vary per request, so the JSON bytes are built once
+_NOT_FOUND_BODY = _error_body(
+    'not_found', 'The requested resource was not found')
+_METHOD_NOT_ALLOWED_BODY = _error_body(
+    'method_not_allowed', 'The method is not allowed for the requested URL')
+_INTERNAL_ERROR_BODY = _error_body(
+    'internal_server_error', 'An internal server error occurred')
+_UNEXPECTED_ERROR_BODY = _error_body(
+    'internal_server_error', 'An unexpected error occurred')
 
 
 def register_error_handlers(app):
     """
     Register custom error handlers
-    
+
     Args:
         app: Flask application instance
     """
     @app.errorhandler(404)
     def not_found(error):
-        return jsonify({
-            'error': 'not_found',
-            'message': 'The requested resource was not found'
-        }), 404
-    
+        return Response(_NOT_FOUND_BODY, status=404,
+                        mimetype='application/json')
+
     @app.errorhandler(405)
     def method_not_allowed(error):
-        return jsonify({
-            'error': 'method_not_allowed',
-            'message': 'The method is not allowed for the requested URL'
-        }), 405
-    
+        return Response(_METHOD_NOT_ALLOWED_BODY, status=405,
+                        mimetype='application/json')
+
     @app.errorhandler(500)
     def internal_error(error):
         app.logger.error(f'Internal server error: {error}')
-        return jsonify({
-            'error': 'internal_server_error',
-            'message': 'An internal server error occurred'
-        }), 500
-    
+        return Response(_INTERNAL_ERROR_BODY, status=500,
+                        mimetype='application/json')
+
     @app.errorhandler(Exception)
     def handle_exception(error):
         app.logger.error(f'Unhandled exception: {error}', exc_info=True)
-        return jsonify({
-            'error': 'internal_server_error',
-            'message': 'An unexpected error occurred'
-        }), 500
+        return Response(_UNEXPECTED_ERROR_BODY, status=500,
+                        mimetype='application/json')
 
 
 def register_jwt_handlers(app):
@@ -171,10 +241,39 @@ def register_jwt_handlers(app):
         }), 401
 
 
+class BufferedRotatingFileHandler(RotatingFileHandler):
+    """
+    RotatingFileHandler that batches writes through a large file buffer
+
+    Records accumulate in a 64KB buffer and reach disk when the buffer
+    fills, cutting one write() syscall per log line on the hot path.
+    Records at ERROR level or above are flushed immediately so failures
+    are always durable, and close() forces a final flush on shutdown.
+    """
+
+    BUFFER_SIZE = 65536
+
+    def _open(self):
+        return open(self.baseFilename, self.mode, buffering=self.BUFFER_SIZE,
+                    encoding=self.encoding)
+
+    def emit(self, record):
+        self._flush_pending = record.levelno >= logging.ERROR
+        super().emit(record)
+
+    def flush(self):
+        if getattr(self, '_flush_pending', True):
+            super().flush()
+
+    def close(self):
+        self._flush_pending = True
+        super().close()
+
+
 def setup_logging(app):
     """
     Setup application logging
-    
+
     Args:
         app: Flask application instance
     """
@@ -187,13 +286,20 @@ def setup_logging(app):
             except Exception:
                 pass  # Fall back to current directory
         
-        # Setup file handler
+        # Setup file handler. With external logrotate configured, a
+        # WatchedFileHandler skips the per-emit size stat and only
+        # reopens the file when its inode changes; otherwise keep
+        # in-process rotation with a large maxBytes so the size check
+        # is amortized over many more writes
         log_file = app.config.get('LOG_FILE', 'app.log')
-        file_handler = RotatingFileHandler(
-            log_file,
-            maxBytes=10485760,  # 10MB
-            backupCount=10
-        )
+        if app.config.get('LOG_ROTATE_EXTERNAL', False):
+            file_handler = WatchedFileHandler(log_file)
+        else:
+            file_handler = BufferedRotatingFileHandler(
+                log_file,
+                maxBytes=104857600,  # 100MB
+                backupCount=10
+            )
         
         # Set log format
         formatter = logging.Formatter(
@@ -204,11 +310,23 @@ def setup_logging(app):
         # Set log level
         log_level = getattr(logging, app.config.get('LOG_LEVEL', 'INFO'))
         file_handler.setLevel(log_level)
-        
+
+        # Hand records to the file handler through a queue so request
+        # threads never block on disk writes; the listener thread drains
+        # the queue and performs the actual I/O
+        log_queue = queue.SimpleQueue()
+        queue_handler = QueueHandler(log_queue)
+        queue_handler.setLevel(log_level)
+
+        listener = QueueListener(log_queue, file_handler, respect_handler_level=True)
+        listener.start()
+        app.extensions['log_listener'] = listener
+        atexit.register(listener.stop)
+
         # Add handler to app logger
-        app.logger.addHandler(file_handler)
+        app.logger.addHandler(queue_handler)
         app.logger.setLevel(log_level)
-        
+
         app.logger.info('Infra Automation Platform startup')
 
 
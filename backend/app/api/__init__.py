@@ -1,8 +1,111 @@
 """API module initialization"""
+from functools import wraps
+from flask import current_app, g, jsonify, request
+from flask_jwt_extended import get_jwt_identity
+from app.extensions import cache
+
+
+def get_request_user():
+    """
+    Get the authenticated user for the current request
+
+    The user is loaded once per request and cached on ``flask.g`` so
+    endpoints that need it multiple times only hit the database once.
+
+    Returns:
+        User object or None
+    """
+    if 'current_user' not in g:
+        from app.services.auth_service import auth_service
+        g.current_user = auth_service.get_current_user(get_jwt_identity())
+    return g.current_user
+
+
+def require_role(required_role):
+    """
+    Require the authenticated caller to hold at least the given role
+
+    Checks the role claim embedded in the JWT instead of loading the
+    user row, and rejects with 403 before the endpoint body runs.
+
+    Args:
+        required_role: Minimum role name ('viewer', 'operator', 'admin')
+    """
+    def decorator(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            from app.services.auth_service import auth_service
+            if not auth_service.check_permission_from_jwt(required_role):
+                return jsonify({
+                    'error': 'forbidden',
+                    'message': 'Insufficient permissions'
+                }), 403
+            return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def get_pagination_args():
+    """
+    Parse and clamp page/per_page from the query string
+
+    Malformed values fall back to defaults instead of raising into the
+    500 handler, and per_page is capped by MAX_PAGE_SIZE so a client
+    cannot request an unbounded row fetch.
+
+    Returns:
+        Tuple of (page, per_page)
+    """
+    args = request.args
+    page = args.get('page', type=int) or 1
+    per_page = (args.get('per_page', type=int)
+                or current_app.config.get('DEFAULT_PAGE_SIZE', 20))
+    max_page_size = current_app.config.get('MAX_PAGE_SIZE', 100)
+    return max(1, page), min(max_page_size, max(1, per_page))
+
+
+def resource_cache_key(resource):
+    """
+    Build a cache key function for GET endpoints of a resource
+
+    Keys combine a per-resource version counter with the caller's
+    identity and the full request path, so cached pages are scoped per
+    user and per query. Mutations call bump_cache_version, which makes
+    every old key unreachable in O(1) instead of scanning for them.
+
+    Args:
+        resource: Resource name, e.g. 'playbooks' or 'servers'
+
+    Returns:
+        Callable usable as make_cache_key for cache.cached
+    """
+    def make_key(*args, **kwargs):
+        version = cache.get(f'{resource}:ver') or 0
+        return f'{resource}:{version}:{get_jwt_identity()}:{request.full_path}'
+    return make_key
+
+
+def bump_cache_version(resource):
+    """
+    Invalidate every cached response for a resource
+
+    Args:
+        resource: Resource name used in resource_cache_key
+    """
+    key = f'{resource}:ver'
+    try:
+        cache.set(key, (cache.get(key) or 0) + 1, timeout=0)
+    except Exception:
+        # Cache backend unavailable; readers fall through to the DB
+        pass
+
+
 from app.api.auth import auth_bp
 from app.api.servers import servers_bp
 from app.api.playbooks import playbooks_bp
 from app.api.jobs import jobs_bp
 from app.api.users import users_bp
 
-__all__ = ['auth_bp', 'servers_bp', 'playbooks_bp', 'jobs_bp', 'users_bp']
+__all__ = ['auth_bp', 'servers_bp', 'playbooks_bp', 'jobs_bp', 'users_bp',
+           'get_request_user', 'require_role', 'get_pagination_args',
+           'resource_cache_key', 'bump_cache_version']
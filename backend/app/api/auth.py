@@ -6,6 +6,7 @@ from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from flask_cors import cross_origin
 from marshmallow import ValidationError
+from app.api import bump_cache_version, get_request_user
 from app.services.auth_service import auth_service
 from app.schemas import (
     user_login_schema, token_response_schema, 
@@ -15,23 +16,19 @@ from app.schemas import (
 auth_bp = Blueprint('auth', __name__, url_prefix='/auth')
 
 
-@auth_bp.route('/login', methods=['POST', 'OPTIONS'])
+@auth_bp.route('/login', methods=['POST'])
 @cross_origin()
 def login():
     """
     User login endpoint
-    
+
     Request Body:
         username: str
         password: str
-    
+
     Returns:
         access_token, refresh_token, and user info
     """
-    # Handle preflight request
-    if request.method == 'OPTIONS':
-        return '', 204
-    
     try:
         # Validate request
         data = user_login_schema.load(request.get_json())
@@ -62,12 +59,6 @@ def login():
             'error': 'authentication_failed',
             'message': str(err)
         })), 401
-    
-    except Exception as err:
-        return jsonify(error_schema.dump({
-            'error': 'internal_error',
-            'message': 'An error occurred during login'
-        })), 500
 
 
 @auth_bp.route('/refresh', methods=['POST'])
@@ -88,12 +79,6 @@ def refresh():
             'error': 'refresh_failed',
             'message': str(err)
         })), 401
-    
-    except Exception as err:
-        return jsonify(error_schema.dump({
-            'error': 'internal_error',
-            'message': 'An error occurred during token refresh'
-        })), 500
 
 
 @auth_bp.route('/register', methods=['POST'])
@@ -113,8 +98,7 @@ def register():
     """
     try:
         # Get current user
-        current_user_id = get_jwt_identity()
-        current_user = auth_service.get_current_user(current_user_id)
+        current_user = get_request_user()
         
         # Check if admin
         if not auth_service.check_permission(current_user, 'admin'):
@@ -133,7 +117,9 @@ def register():
             password=data['password'],
             role=data['role']
         )
-        
+
+        bump_cache_version('users')
+
         return jsonify(user_schema.dump(user)), 201
     
     except ValidationError as err:
@@ -148,32 +134,22 @@ def register():
             'error': 'registration_failed',
             'message': str(err)
         })), 400
-    
-    except Exception as err:
-        return jsonify(error_schema.dump({
-            'error': 'internal_error',
-            'message': 'An error occurred during registration'
-        })), 500
 
 
-@auth_bp.route('/signup', methods=['POST', 'OPTIONS'])
+@auth_bp.route('/signup', methods=['POST'])
 @cross_origin()
 def signup():
     """
     Public user registration (creates viewer role by default)
-    
+
     Request Body:
         username: str
         email: str
         password: str
-    
+
     Returns:
         Created user info
     """
-    # Handle preflight request
-    if request.method == 'OPTIONS':
-        return '', 204
-    
     try:
         # Get request data
         data = request.get_json()
@@ -203,7 +179,9 @@ def signup():
             password=password,
             role='viewer'  # Default role for self-registration
         )
-        
+
+        bump_cache_version('users')
+
         return jsonify({
             'message': 'Account created successfully',
             'user': user_schema.dump(user)
@@ -214,12 +192,6 @@ def signup():
             'error': 'registration_failed',
             'message': str(err)
         })), 400
-    
-    except Exception as err:
-        return jsonify(error_schema.dump({
-            'error': 'internal_error',
-            'message': 'An error occurred during registration'
-        })), 500
 
 
 @auth_bp.route('/me', methods=['GET'])
@@ -231,23 +203,15 @@ def get_current_user_info():
     Returns:
         Current user info
     """
-    try:
-        current_user_id = get_jwt_identity()
-        user = auth_service.get_current_user(current_user_id)
-        
-        if not user:
-            return jsonify(error_schema.dump({
-                'error': 'not_found',
-                'message': 'User not found'
-            })), 404
-        
-        return jsonify(user_schema.dump(user)), 200
-    
-    except Exception as err:
+    user = get_request_user()
+
+    if not user:
         return jsonify(error_schema.dump({
-            'error': 'internal_error',
-            'message': 'An error occurred'
-        })), 500
+            'error': 'not_found',
+            'message': 'User not found'
+        })), 404
+
+    return jsonify(user_schema.dump(user)), 200
 
 
 @auth_bp.route('/change-password', methods=['POST'])
@@ -291,9 +255,3 @@ def change_password():
             'error': 'change_password_failed',
             'message': str(err)
         })), 400
-    
-    except Exception as err:
-        return jsonify(error_schema.dump({
-            'error': 'internal_error',
-            'message': 'An error occurred during password change'
-        })), 500
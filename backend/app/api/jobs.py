@@ -2,10 +2,14 @@
 Job API Endpoints
 Handles job creation, monitoring, and log retrieval
 """
-from flask import Blueprint, request, jsonify
+import hashlib
+import uuid
+from flask import (Blueprint, Response, current_app, jsonify, request,
+                   stream_with_context)
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from marshmallow import ValidationError
 from app.extensions import db
+from app.api import get_pagination_args
 from app.services.auth_service import auth_service
 from app.services.job_service import job_service
 from app.schemas import (
@@ -13,12 +17,56 @@ from app.schemas import (
     job_logs_schema, ticket_schema, ticket_create_schema,
     error_schema
 )
-# Import celery task
-from app.tasks import execute_playbook_task
 
 jobs_bp = Blueprint('jobs', __name__, url_prefix='/jobs')
 
 
+def _job_to_dict(job):
+    """
+    Serialize a Job for the list endpoint without marshmallow dispatch
+
+    Mirrors the shape produced by JobSchema but builds plain dicts
+    directly, avoiding per-field accessor resolution on the hot list
+    path.
+    """
+    return {
+        'id': job.id,
+        'job_id': job.job_id,
+        'status': job.status,
+        'celery_task_id': job.celery_task_id,
+        'extra_vars': job.extra_vars,
+        'error_message': job.error_message,
+        'log_count': job.log_count,
+        'started_at': job.started_at.isoformat() if job.started_at else None,
+        'completed_at': job.completed_at.isoformat() if job.completed_at else None,
+        'created_at': job.created_at.isoformat() if job.created_at else None,
+        'playbook': {
+            'id': job.playbook.id,
+            'name': job.playbook.name
+        } if job.playbook else None,
+        'server': {
+            'id': job.server.id,
+            'hostname': job.server.hostname,
+            'ip_address': job.server.ip_address
+        } if job.server else None,
+        'user': {
+            'id': job.user.id,
+            'username': job.user.username
+        } if job.user else None,
+    }
+
+
+def _job_etag(job):
+    """
+    Build an ETag for a job from its mutable fields
+
+    Jobs only change status and completion timestamps, so those plus the
+    id identify a representation without an updated_at column.
+    """
+    ts = job.completed_at or job.started_at or job.created_at
+    return f'{job.id}-{job.status}-{ts.isoformat() if ts else ""}'
+
+
 @jobs_bp.route('', methods=['GET'])
 @jwt_required()
 def get_jobs():
@@ -32,43 +80,71 @@ def get_jobs():
         user_id: int
         page: int
         per_page: int
-    
+        cursor: int - Keyset cursor; return jobs with id below this value
+
     Returns:
         List of jobs with pagination
     """
-    try:
-        # Extract filters from query params
-        filters = {}
-        if request.args.get('status'):
-            filters['status'] = request.args.get('status')
-        if request.args.get('playbook_id'):
-            filters['playbook_id'] = int(request.args.get('playbook_id'))
-        if request.args.get('server_id'):
-            filters['server_id'] = int(request.args.get('server_id'))
-        if request.args.get('user_id'):
-            filters['user_id'] = int(request.args.get('user_id'))
-        
-        page = int(request.args.get('page', 1))
-        per_page = int(request.args.get('per_page', 20))
-        
-        # Get jobs
-        pagination = job_service.get_all_jobs(filters, page, per_page)
-        
+    # Extract filters from query params; type=int parses and drops
+    # malformed values in one pass instead of re-reading each arg
+    args = request.args
+    filters = {}
+    status = args.get('status')
+    if status:
+        filters['status'] = status
+    playbook_id = args.get('playbook_id', type=int)
+    if playbook_id:
+        filters['playbook_id'] = playbook_id
+    server_id = args.get('server_id', type=int)
+    if server_id:
+        filters['server_id'] = server_id
+    user_id = args.get('user_id', type=int)
+    if user_id:
+        filters['user_id'] = user_id
+
+    page, per_page = get_pagination_args()
+
+    # Keyset pagination: O(per_page) regardless of page depth, with
+    # the total served from a short-lived count cache
+    if 'cursor' in args:
+        cursor_id = args.get('cursor', type=int)
+        jobs = job_service.get_all_jobs_keyset(filters, cursor_id, per_page)
+
         return jsonify({
-            'items': jobs_schema.dump(pagination.items),
+            'items': [_job_to_dict(job) for job in jobs],
             'pagination': {
-                'page': pagination.page,
-                'per_page': pagination.per_page,
-                'total': pagination.total,
-                'pages': pagination.pages
+                'per_page': per_page,
+                'total': job_service.get_jobs_count(filters),
+                'next_cursor': jobs[-1].id if len(jobs) == per_page else None
             }
         }), 200
-    
-    except Exception as err:
-        return jsonify(error_schema.dump({
-            'error': 'internal_error',
-            'message': 'An error occurred while fetching jobs'
-        })), 500
+
+    # Get jobs
+    pagination = job_service.get_all_jobs(filters, page, per_page)
+
+    # Collection ETag: the page is unchanged as long as the total and
+    # every row's (id, status, timestamps) are unchanged, so polling
+    # clients get a body-less 304 between job state transitions
+    state = f"{pagination.total}:" + ",".join(
+        _job_etag(job) for job in pagination.items
+    )
+    etag = hashlib.md5(state.encode()).hexdigest()
+    if etag in request.if_none_match:
+        return '', 304
+
+    response = jsonify({
+        'items': [_job_to_dict(job) for job in pagination.items],
+        'pagination': {
+            'page': pagination.page,
+            'per_page': pagination.per_page,
+            'total': pagination.total,
+            'pages': pagination.pages
+        }
+    })
+    response.set_etag(etag)
+    response.cache_control.max_age = 0
+    response.cache_control.must_revalidate = True
+    return response, 200
 
 
 @jobs_bp.route('/<int:job_id>', methods=['GET'])
@@ -80,22 +156,23 @@ def get_job(job_id):
     Returns:
         Job details
     """
-    try:
-        job = job_service.get_job(job_id)
-        
-        if not job:
-            return jsonify(error_schema.dump({
-                'error': 'not_found',
-                'message': f'Job with ID {job_id} not found'
-            })), 404
-        
-        return jsonify(job_schema.dump(job)), 200
-    
-    except Exception as err:
+    job = job_service.get_job(job_id)
+
+    if not job:
         return jsonify(error_schema.dump({
-            'error': 'internal_error',
-            'message': 'An error occurred while fetching job'
-        })), 500
+            'error': 'not_found',
+            'message': f'Job with ID {job_id} not found'
+        })), 404
+
+    etag = _job_etag(job)
+    if etag in request.if_none_match:
+        return '', 304
+
+    response = jsonify(job_schema.dump(job))
+    response.set_etag(etag)
+    response.cache_control.max_age = 0
+    response.cache_control.must_revalidate = True
+    return response, 200
 
 
 @jobs_bp.route('', methods=['POST'])
@@ -115,10 +192,9 @@ def create_job():
     try:
         # Get current user
         current_user_id = get_jwt_identity()
-        current_user = auth_service.get_current_user(current_user_id)
-        
-        # Check permission
-        if not auth_service.check_permission(current_user, 'operator'):
+
+        # Check permission straight from the token's role claim
+        if not auth_service.check_permission_from_jwt('operator'):
             return jsonify(error_schema.dump({
                 'error': 'forbidden',
                 'message': 'Insufficient permissions to create jobs'
@@ -127,20 +203,25 @@ def create_job():
         # Validate request
         data = job_create_schema.load(request.get_json())
         
+        # Generate the Celery task ID up front so the job row is written
+        # once with it, instead of a second UPDATE after dispatch
+        task_id = str(uuid.uuid4())
+
         # Create job
         job = job_service.create_job(
             playbook_id=data['playbook_id'],
             server_id=data['server_id'],
             user_id=current_user_id,
-            extra_vars=data.get('extra_vars')
+            extra_vars=data.get('extra_vars'),
+            celery_task_id=task_id
         )
-        
-        # Trigger async execution
-        task = execute_playbook_task.delay(job.id)
-        
-        # Update job with celery task ID
-        job_service.update_job_status(job.id, 'pending', celery_task_id=task.id)
-        
+
+        # Trigger async execution by task name; the task module (and its
+        # heavy ansible-runner dependencies) is only imported in the worker
+        from app.extensions import celery
+        celery.send_task('app.tasks.execute_playbook_task',
+                         args=[job.id], task_id=task_id)
+
         return jsonify(job_schema.dump(job)), 201
     
     except ValidationError as err:
@@ -155,12 +236,6 @@ def create_job():
             'error': 'creation_failed',
             'message': str(err)
         })), 400
-    
-    except Exception as err:
-        return jsonify(error_schema.dump({
-            'error': 'internal_error',
-            'message': f'An error occurred while creating job: {str(err)}'
-        })), 500
 
 
 @jobs_bp.route('/<int:job_id>/logs', methods=['GET'])
@@ -176,35 +251,68 @@ def get_job_logs(job_id):
     Returns:
         Job logs
     """
-    try:
-        # Check if job exists
-        job = job_service.get_job(job_id)
-        if not job:
-            return jsonify(error_schema.dump({
-                'error': 'not_found',
-                'message': f'Job with ID {job_id} not found'
-            })), 404
-        
-        # Get query params
-        start_line = request.args.get('start_line', type=int)
-        limit = request.args.get('limit', type=int)
-        
-        # Get logs
-        logs = job_service.get_job_logs(job_id, start_line, limit)
-        total_logs = job_service.get_job_logs_count(job_id)
-        
-        return jsonify({
-            'job_id': job_id,
-            'logs': job_logs_schema.dump(logs),
-            'total_lines': total_logs,
-            'returned_lines': len(logs)
-        }), 200
-    
-    except Exception as err:
+    # Existence gate only — no need to load the row
+    if not job_service.job_exists(job_id):
+        return jsonify(error_schema.dump({
+            'error': 'not_found',
+            'message': f'Job with ID {job_id} not found'
+        })), 404
+
+    # Get query params; cap the window so a 100k-line job can never be
+    # materialized into one response — full logs are served by the
+    # NDJSON streaming endpoint below
+    start_line = request.args.get('start_line', type=int)
+    limit = request.args.get('limit', type=int)
+    if not limit or limit > 10000:
+        limit = 10000
+
+    # Get logs and total in one round-trip
+    logs, total_logs = job_service.get_job_logs_with_count(job_id, start_line, limit)
+
+    return jsonify({
+        'job_id': job_id,
+        'logs': job_logs_schema.dump(logs),
+        'total_lines': total_logs,
+        'returned_lines': len(logs)
+    }), 200
+
+
+@jobs_bp.route('/<int:job_id>/logs/stream', methods=['GET'])
+@jwt_required()
+def stream_job_logs(job_id):
+    """
+    Stream job execution logs as newline-delimited JSON
+
+    Serves one log entry per line so large logs never need to be held
+    in memory as a single response body.
+
+    Query Parameters:
+        start_line: int - Starting line number
+
+    Returns:
+        NDJSON stream of log entries
+    """
+    if not job_service.job_exists(job_id):
         return jsonify(error_schema.dump({
-            'error': 'internal_error',
-            'message': 'An error occurred while fetching logs'
-        })), 500
+            'error': 'not_found',
+            'message': f'Job with ID {job_id} not found'
+        })), 404
+
+    start_line = request.args.get('start_line', type=int)
+    dumps = current_app.json.dumps
+
+    def generate():
+        for log in job_service.iter_job_logs(job_id, start_line):
+            yield dumps({
+                'id': log.id,
+                'line_number': log.line_number,
+                'content': log.content,
+                'log_level': log.log_level,
+                'timestamp': log.timestamp.isoformat() if log.timestamp else None
+            }) + '\n'
+
+    return Response(stream_with_context(generate()),
+                    mimetype='application/x-ndjson')
 
 
 @jobs_bp.route('/<int:job_id>/cancel', methods=['POST'])
@@ -219,10 +327,9 @@ def cancel_job(job_id):
     try:
         # Get current user
         current_user_id = get_jwt_identity()
-        current_user = auth_service.get_current_user(current_user_id)
-        
-        # Check permission
-        if not auth_service.check_permission(current_user, 'operator'):
+
+        # Check permission straight from the token's role claim
+        if not auth_service.check_permission_from_jwt('operator'):
             return jsonify(error_schema.dump({
                 'error': 'forbidden',
                 'message': 'Insufficient permissions to cancel jobs'
@@ -243,12 +350,6 @@ def cancel_job(job_id):
             'error': 'cancellation_failed',
             'message': str(err)
         })), 400
-    
-    except Exception as err:
-        return jsonify(error_schema.dump({
-            'error': 'internal_error',
-            'message': 'An error occurred while cancelling job'
-        })), 500
 
 
 @jobs_bp.route('/<int:job_id>/ticket', methods=['POST'])
@@ -302,12 +403,6 @@ def create_ticket_from_job(job_id):
             'error': 'creation_failed',
             'message': str(err)
         })), 400
-    
-    except Exception as err:
-        return jsonify(error_schema.dump({
-            'error': 'internal_error',
-            'message': 'An error occurred while creating ticket'
-        })), 500
 
 
 @jobs_bp.route('/stats', methods=['GET'])
@@ -322,14 +417,7 @@ def get_job_statistics():
     Returns:
         Job statistics
     """
-    try:
-        user_id = request.args.get('user_id', type=int)
-        stats = job_service.get_job_statistics(user_id)
-        
-        return jsonify(stats), 200
-    
-    except Exception as err:
-        return jsonify(error_schema.dump({
-            'error': 'internal_error',
-            'message': 'An error occurred while fetching statistics'
-        })), 500
+    user_id = request.args.get('user_id', type=int)
+    stats = job_service.get_job_statistics(user_id)
+
+    return jsonify(stats), 200
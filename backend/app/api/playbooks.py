@@ -2,11 +2,16 @@
 Playbook API Endpoints
 Handles playbook upload, retrieval, and management
 """
-from flask import Blueprint, request, jsonify
+import base64
+import json
+from datetime import datetime
+from flask import Blueprint, Response, request, jsonify, stream_with_context
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from marshmallow import ValidationError
 from werkzeug.utils import secure_filename
-from app.services.auth_service import auth_service
+from app.api import (bump_cache_version, get_pagination_args, require_role,
+                     resource_cache_key)
+from app.extensions import cache
 from app.services.playbook_service import playbook_service
 from app.schemas import (
     playbook_schema, playbooks_schema, playbook_create_schema,
@@ -16,8 +21,26 @@ from app.schemas import (
 playbooks_bp = Blueprint('playbooks', __name__, url_prefix='/playbooks')
 
 
+def _encode_playbook_cursor(playbook):
+    """Opaque keyset cursor from the last row of a page"""
+    raw = json.dumps([playbook.created_at.isoformat(), playbook.id])
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def _decode_playbook_cursor(cursor):
+    """Decode a cursor back to (created_at, id); raises ValueError"""
+    try:
+        created_at_iso, last_id = json.loads(
+            base64.urlsafe_b64decode(cursor.encode())
+        )
+        return datetime.fromisoformat(created_at_iso), int(last_id)
+    except Exception as exc:
+        raise ValueError('Invalid cursor') from exc
+
+
 @playbooks_bp.route('', methods=['GET'])
 @jwt_required()
+@cache.cached(make_cache_key=resource_cache_key('playbooks'))
 def get_playbooks():
     """
     Get all playbooks with optional filtering
@@ -27,31 +50,64 @@ def get_playbooks():
         search: str
         page: int
         per_page: int
-    
+        cursor: str - opaque keyset cursor; replaces page when given
+
     Returns:
         List of playbooks with pagination
     """
+    args = request.args
+
+    # Decode outside the blanket handler so a malformed cursor is a
+    # client error, not a 500
+    cursor_arg = args.get('cursor')
+    try:
+        cursor = _decode_playbook_cursor(cursor_arg) if cursor_arg else None
+    except ValueError:
+        return jsonify(error_schema.dump({
+            'error': 'bad_request',
+            'message': 'Invalid cursor'
+        })), 400
+
     try:
         # Extract filters from query params
         filters = {}
-        if request.args.get('is_active'):
-            filters['is_active'] = request.args.get('is_active').lower() == 'true'
-        if request.args.get('search'):
-            filters['search'] = request.args.get('search')
-        
-        page = int(request.args.get('page', 1))
-        per_page = int(request.args.get('per_page', 20))
-        
+        if args.get('is_active'):
+            filters['is_active'] = args.get('is_active').lower() == 'true'
+        if args.get('search'):
+            filters['search'] = args.get('search')
+
+        page, per_page = get_pagination_args()
+
+        if cursor:
+            # Keyset path: constant cost at any depth, no COUNT(*)
+            rows = playbook_service.get_all_playbooks(
+                filters, per_page=per_page, cursor=cursor
+            )
+            has_more = len(rows) > per_page
+            items = rows[:per_page]
+            return jsonify({
+                'items': [playbook.to_fast_dict() for playbook in items],
+                'pagination': {
+                    'per_page': per_page,
+                    'next_cursor': (_encode_playbook_cursor(items[-1])
+                                    if has_more else None)
+                }
+            }), 200
+
         # Get playbooks
         pagination = playbook_service.get_all_playbooks(filters, page, per_page)
-        
+
+        items = pagination.items
         return jsonify({
-            'items': playbooks_schema.dump(pagination.items),
+            'items': [playbook.to_fast_dict() for playbook in items],
             'pagination': {
                 'page': pagination.page,
                 'per_page': pagination.per_page,
                 'total': pagination.total,
-                'pages': pagination.pages
+                'pages': pagination.pages,
+                # Seed for switching to cursor paging on the next call
+                'next_cursor': (_encode_playbook_cursor(items[-1])
+                                if items else None)
             }
         }), 200
     
@@ -64,6 +120,7 @@ def get_playbooks():
 
 @playbooks_bp.route('/<int:playbook_id>', methods=['GET'])
 @jwt_required()
+@cache.cached(make_cache_key=resource_cache_key('playbooks'))
 def get_playbook(playbook_id):
     """
     Get a specific playbook by ID
@@ -91,6 +148,7 @@ def get_playbook(playbook_id):
 
 @playbooks_bp.route('/<int:playbook_id>/content', methods=['GET'])
 @jwt_required()
+@cache.cached(make_cache_key=resource_cache_key('playbooks'))
 def get_playbook_content(playbook_id):
     """
     Get playbook file content
@@ -119,6 +177,77 @@ def get_playbook_content(playbook_id):
         })), 500
 
 
+@playbooks_bp.route('/<int:playbook_id>/content/raw', methods=['GET'])
+@jwt_required()
+def stream_playbook_content(playbook_id):
+    """
+    Stream raw playbook YAML
+
+    Serves the file in 64KB chunks so concurrent readers never hold
+    the whole content in memory, unlike the JSON content endpoint.
+
+    Returns:
+        text/yaml stream of the playbook file
+    """
+    try:
+        chunks = playbook_service.iter_playbook_content(playbook_id)
+    except ValueError as err:
+        return jsonify(error_schema.dump({
+            'error': 'not_found',
+            'message': str(err)
+        })), 404
+
+    return Response(stream_with_context(chunks), mimetype='text/yaml')
+
+
+@playbooks_bp.route('/<int:playbook_id>/content', methods=['PUT'])
+@jwt_required()
+@require_role('operator')
+def update_playbook_content(playbook_id):
+    """
+    Replace playbook file content (operator or admin only)
+
+    Request Body:
+        content: str (required)
+
+    Returns:
+        Updated playbook
+    """
+    try:
+        current_user_id = get_jwt_identity()
+
+        data = request.get_json(silent=True) or {}
+        content = data.get('content')
+        if not isinstance(content, str) or not content.strip():
+            return jsonify(error_schema.dump({
+                'error': 'validation_error',
+                'message': 'content is required'
+            })), 400
+
+        # Deliberately synchronous, unlike refresh_all_metrics: the
+        # body caps at MAX_CONTENT_LENGTH and the write is a YAML parse
+        # plus one atomic replace, shorter than a queue round trip
+        playbook = playbook_service.update_playbook_content(
+            playbook_id, content, current_user_id
+        )
+
+        bump_cache_version('playbooks')
+
+        return jsonify(playbook_schema.dump(playbook)), 200
+
+    except ValueError as err:
+        return jsonify(error_schema.dump({
+            'error': 'update_failed',
+            'message': str(err)
+        })), 400
+
+    except Exception as err:
+        return jsonify(error_schema.dump({
+            'error': 'internal_error',
+            'message': 'An error occurred while updating playbook content'
+        })), 500
+
+
 @playbooks_bp.route('/upload', methods=['POST'])
 @jwt_required()
 def upload_playbook():
@@ -136,15 +265,10 @@ def upload_playbook():
     try:
         # Get current user
         current_user_id = get_jwt_identity()
-        current_user = auth_service.get_current_user(current_user_id)
-        
+
         # Allow all authenticated users to upload playbooks for now
-        # if not auth_service.check_permission(current_user, 'operator'):
-        #     return jsonify(error_schema.dump({
-        #         'error': 'forbidden',
-        #         'message': 'Insufficient permissions to upload playbooks'
-        #     })), 403
-        
+        # (switch to @require_role('operator') to restrict)
+
         # Check if file is present
         if 'file' not in request.files:
             return jsonify(error_schema.dump({
@@ -170,14 +294,20 @@ def upload_playbook():
                 'message': 'Playbook name is required'
             })), 400
         
-        # Create playbook
+        # Deliberately synchronous, unlike refresh_all_metrics: the
+        # upload is already in hand by the time this handler runs, and
+        # create_playbook streams it to storage in 64KB chunks, so the
+        # remaining work is local-disk bound and shorter than a queue
+        # round trip. Callers also get the created row back in one call.
         playbook = playbook_service.create_playbook(
             name=name,
             file_obj=file,
             description=description,
             user_id=current_user_id
         )
-        
+
+        bump_cache_version('playbooks')
+
         return jsonify(playbook_schema.dump(playbook)), 201
     
     except ValidationError as err:
@@ -202,6 +332,7 @@ def upload_playbook():
 
 @playbooks_bp.route('/<int:playbook_id>', methods=['PUT'])
 @jwt_required()
+@require_role('operator')
 def update_playbook(playbook_id):
     """
     Update playbook metadata (operator or admin only)
@@ -216,23 +347,16 @@ def update_playbook(playbook_id):
         Updated playbook
     """
     try:
-        # Get current user
         current_user_id = get_jwt_identity()
-        current_user = auth_service.get_current_user(current_user_id)
-        
-        # Check permission
-        if not auth_service.check_permission(current_user, 'operator'):
-            return jsonify(error_schema.dump({
-                'error': 'forbidden',
-                'message': 'Insufficient permissions to update playbooks'
-            })), 403
-        
+
         # Validate request
         data = playbook_update_schema.load(request.get_json())
         
         # Update playbook
         playbook = playbook_service.update_playbook(playbook_id, data, current_user_id)
-        
+
+        bump_cache_version('playbooks')
+
         return jsonify(playbook_schema.dump(playbook)), 200
     
     except ValidationError as err:
@@ -257,6 +381,7 @@ def update_playbook(playbook_id):
 
 @playbooks_bp.route('/<int:playbook_id>', methods=['DELETE'])
 @jwt_required()
+@require_role('admin')
 def delete_playbook(playbook_id):
     """
     Delete playbook (admin only, soft delete by default)
@@ -268,20 +393,13 @@ def delete_playbook(playbook_id):
         Success message
     """
     try:
-        # Get current user
         current_user_id = get_jwt_identity()
-        current_user = auth_service.get_current_user(current_user_id)
-        
-        # Check permission
-        if not auth_service.check_permission(current_user, 'admin'):
-            return jsonify(error_schema.dump({
-                'error': 'forbidden',
-                'message': 'Insufficient permissions to delete playbooks'
-            })), 403
-        
+
         # Always do hard delete (permanently remove from database)
         playbook_service.hard_delete_playbook(playbook_id, current_user_id)
-        
+
+        bump_cache_version('playbooks')
+
         return jsonify({'message': 'Playbook deleted successfully'}), 200
     
     except ValueError as err:
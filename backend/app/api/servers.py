@@ -2,10 +2,12 @@
 Server API Endpoints
 Handles server inventory CRUD operations
 """
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, current_app, jsonify, request
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from marshmallow import ValidationError
-from app.services.auth_service import auth_service
+from app.api import (bump_cache_version, get_pagination_args, require_role,
+                     resource_cache_key)
+from app.extensions import cache
 from app.services.server_service import server_service
 from app.schemas import (
     server_schema, servers_schema, server_create_schema, 
@@ -17,6 +19,7 @@ servers_bp = Blueprint('servers', __name__, url_prefix='/servers')
 
 @servers_bp.route('', methods=['GET'])
 @jwt_required()
+@cache.cached(make_cache_key=resource_cache_key('servers'))
 def get_servers():
     """
     Get all servers with optional filtering
@@ -44,14 +47,13 @@ def get_servers():
         if request.args.get('search'):
             filters['search'] = request.args.get('search')
         
-        page = int(request.args.get('page', 1))
-        per_page = int(request.args.get('per_page', 20))
+        page, per_page = get_pagination_args()
         
         # Get servers
         pagination = server_service.get_all_servers(filters, page, per_page)
         
         return jsonify({
-            'items': servers_schema.dump(pagination.items),
+            'items': [server.to_fast_dict() for server in pagination.items],
             'pagination': {
                 'page': pagination.page,
                 'per_page': pagination.per_page,
@@ -69,6 +71,7 @@ def get_servers():
 
 @servers_bp.route('/<int:server_id>', methods=['GET'])
 @jwt_required()
+@cache.cached(make_cache_key=resource_cache_key('servers'))
 def get_server(server_id):
     """
     Get a specific server by ID
@@ -113,54 +116,38 @@ def create_server():
     try:
         # Get current user
         current_user_id = get_jwt_identity()
-        current_user = auth_service.get_current_user(current_user_id)
-        
+
         # Allow all authenticated users to create servers for now
-        # if not auth_service.check_permission(current_user, 'operator'):
-        #     return jsonify(error_schema.dump({
-        #         'error': 'forbidden',
-        #         'message': 'Insufficient permissions to create servers'
-        #     })), 403
-        
+        # (switch to @require_role('operator') to restrict)
+
         # Validate request
-        print("Received data:", request.get_json())
         data = server_create_schema.load(request.get_json())
-        print("Validated data:", data)
-        
+
         # Create server
         server = server_service.create_server(data, current_user_id)
-        
+
+        bump_cache_version('servers')
+
         return jsonify(server_schema.dump(server)), 201
-    
+
     except ValidationError as err:
-        print("Validation error:", err.messages)
+        # Lazy %-formatting: the message only renders at DEBUG level
+        current_app.logger.debug('create_server validation failed: %s',
+                                 err.messages)
         return jsonify(error_schema.dump({
             'error': 'validation_error',
             'message': 'Invalid request data',
             'details': err.messages
         })), 400
-    
+
     except ValueError as err:
-        print("Value error:", str(err))
         return jsonify(error_schema.dump({
             'error': 'validation_error',
             'message': str(err)
         })), 400
-    
-    except Exception as err:
-        print("Exception creating server:", str(err))
-        import traceback
-        traceback.print_exc()
-        return jsonify(error_schema.dump({
-            'error': 'internal_error',
-            'message': 'An error occurred while creating server'
-        })), 500
-        return jsonify(error_schema.dump({
-            'error': 'creation_failed',
-            'message': str(err)
-        })), 400
-    
-    except Exception as err:
+
+    except Exception:
+        current_app.logger.exception('create_server failed')
         return jsonify(error_schema.dump({
             'error': 'internal_error',
             'message': 'An error occurred while creating server'
@@ -169,6 +156,7 @@ def create_server():
 
 @servers_bp.route('/<int:server_id>', methods=['PUT'])
 @jwt_required()
+@require_role('operator')
 def update_server(server_id):
     """
     Update server details (operator or admin only)
@@ -180,23 +168,16 @@ def update_server(server_id):
         Updated server
     """
     try:
-        # Get current user
         current_user_id = get_jwt_identity()
-        current_user = auth_service.get_current_user(current_user_id)
-        
-        # Check permission
-        if not auth_service.check_permission(current_user, 'operator'):
-            return jsonify(error_schema.dump({
-                'error': 'forbidden',
-                'message': 'Insufficient permissions to update servers'
-            })), 403
-        
+
         # Validate request
         data = server_update_schema.load(request.get_json())
         
         # Update server
         server = server_service.update_server(server_id, data, current_user_id)
-        
+
+        bump_cache_version('servers')
+
         return jsonify(server_schema.dump(server)), 200
     
     except ValidationError as err:
@@ -221,6 +202,7 @@ def update_server(server_id):
 
 @servers_bp.route('/<int:server_id>', methods=['DELETE'])
 @jwt_required()
+@require_role('admin')
 def delete_server(server_id):
     """
     Delete server (admin only, soft delete by default)
@@ -232,17 +214,8 @@ def delete_server(server_id):
         Success message
     """
     try:
-        # Get current user
         current_user_id = get_jwt_identity()
-        current_user = auth_service.get_current_user(current_user_id)
-        
-        # Check permission
-        if not auth_service.check_permission(current_user, 'admin'):
-            return jsonify(error_schema.dump({
-                'error': 'forbidden',
-                'message': 'Insufficient permissions to delete servers'
-            })), 403
-        
+
         # Check if hard delete
         hard_delete = request.args.get('hard', 'false').lower() == 'true'
         
@@ -250,7 +223,9 @@ def delete_server(server_id):
             server_service.hard_delete_server(server_id, current_user_id)
         else:
             server_service.delete_server(server_id, current_user_id)
-        
+
+        bump_cache_version('servers')
+
         return jsonify({'message': 'Server deleted successfully'}), 200
     
     except ValueError as err:
@@ -308,36 +283,67 @@ def get_server_metrics(server_id):
 
 @servers_bp.route('/metrics/refresh', methods=['POST'])
 @jwt_required()
+@require_role('operator')
 def refresh_all_metrics():
     """
-    Refresh metrics for all active servers
+    Refresh metrics for all active servers, or a specific subset
     Requires operator or admin role
-    
+
+    Request Body (optional):
+        server_ids: list of int - Only refresh these servers (max 200)
+
+    Query Parameters:
+        wait: bool - If true, refresh synchronously and return results
+
     Returns:
-        Summary of updated metrics
+        202 with the Celery task id, or the metrics summary with
+        ?wait=true
     """
     try:
-        # Check permissions
-        current_user_id = get_jwt_identity()
-        current_user = auth_service.get_user_by_id(int(current_user_id))
-        
-        if not auth_service.check_permission(current_user, 'operator'):
+        data = request.get_json(silent=True) or {}
+        server_ids = data.get('server_ids')
+
+        if server_ids and len(server_ids) > 200:
+            # Targeted refresh: a UI showing one page of servers should
+            # not fan SSH out to the whole fleet
             return jsonify(error_schema.dump({
-                'error': 'forbidden',
-                'message': 'Insufficient permissions'
-            })), 403
-        
+                'error': 'validation_error',
+                'message': 'Cannot refresh more than 200 servers at once'
+            })), 400
+
+        wait = request.args.get('wait', 'false').lower() == 'true'
+
+        if not wait:
+            # Default path: the SSH fan-out runs on a worker so the
+            # HTTP worker is released immediately
+            from app.extensions import celery
+            task = celery.send_task('app.tasks.refresh_server_metrics',
+                                    args=[server_ids])
+            return jsonify({
+                'message': 'Metrics refresh queued',
+                'task_id': task.id
+            }), 202
+
         from app.services.monitor_service import ServerMonitor
-        
-        # Update all servers
-        results = ServerMonitor.update_all_servers()
-        
+        from app.models import Server
+
+        if server_ids:
+            servers = Server.query.filter(
+                Server.id.in_(server_ids),
+                Server.is_active.is_(True)
+            ).all()
+            results = ServerMonitor.update_servers(servers)
+        else:
+            results = ServerMonitor.update_all_servers()
+
+        bump_cache_version('servers')
+
         return jsonify({
             'message': 'Metrics refreshed successfully',
             'servers_updated': len(results),
             'results': results
         }), 200
-    
+
     except Exception as err:
         return jsonify(error_schema.dump({
             'error': 'internal_error',
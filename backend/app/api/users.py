@@ -2,12 +2,19 @@
 User API Endpoints
 Handles user management operations
 """
+import base64
+import json
+from datetime import datetime
 from flask import Blueprint, request, jsonify
-from flask_jwt_extended import jwt_required, get_jwt_identity
+from flask_jwt_extended import jwt_required, get_jwt, get_jwt_identity
 from marshmallow import ValidationError
-from app.extensions import db
+from sqlalchemy import tuple_
+from sqlalchemy.exc import IntegrityError
+from app.api import (bump_cache_version, get_pagination_args,
+                     resource_cache_key)
+from app.extensions import cache, db
 from app.services.auth_service import auth_service
-from app.models import User
+from app.models import User, approx_row_count
 from app.schemas import (
     user_schema, users_schema, user_update_schema, error_schema
 )
@@ -15,8 +22,26 @@ from app.schemas import (
 users_bp = Blueprint('users', __name__, url_prefix='/users')
 
 
+def _encode_user_cursor(user):
+    """Encode the (created_at, id) of the last row as an opaque cursor"""
+    raw = json.dumps([user.created_at.isoformat(), user.id])
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def _decode_user_cursor(cursor):
+    """Decode a cursor back to (created_at, id); raises ValueError"""
+    try:
+        created_at, user_id = json.loads(
+            base64.urlsafe_b64decode(cursor.encode())
+        )
+        return datetime.fromisoformat(created_at), int(user_id)
+    except Exception as exc:
+        raise ValueError('Invalid cursor') from exc
+
+
 @users_bp.route('', methods=['GET'])
 @jwt_required()
+@cache.cached(make_cache_key=resource_cache_key('users'))
 def get_users():
     """
     Get all users (admin only)
@@ -26,50 +51,100 @@ def get_users():
         is_active: bool
         page: int
         per_page: int
-    
+        cursor: str - Opaque keyset cursor from a previous page
+
     Returns:
         List of users with pagination
     """
+    # Read the multidict once; each .get re-runs the key lookup
+    args = request.args
+
+    # Decode the cursor outside the catch-all so a malformed value is a
+    # 400, not a 500
+    cursor = args.get('cursor')
+    if cursor is not None:
+        try:
+            cursor_created_at, cursor_id = _decode_user_cursor(cursor)
+        except ValueError:
+            return jsonify(error_schema.dump({
+                'error': 'validation_error',
+                'message': 'Invalid cursor'
+            })), 400
+
     try:
-        # Get current user
-        current_user_id = get_jwt_identity()
-        current_user = auth_service.get_current_user(current_user_id)
-        
-        # Check permission
-        if not auth_service.check_permission(current_user, 'admin'):
+        # The signed token already carries the role claim, so the
+        # listing needs no extra SELECT to authorize — staleness is
+        # bounded by the token lifetime, same as jwt_required itself.
+        # (The proposed EXISTS-subquery would still cost a round-trip.)
+        if get_jwt().get('role') != 'admin':
             return jsonify(error_schema.dump({
                 'error': 'forbidden',
                 'message': 'Insufficient permissions to view users'
             })), 403
-        
+
         # Build query
         query = User.query
-        
+        filtered = False
+
         # Apply filters
-        if request.args.get('role'):
-            query = query.filter_by(role=request.args.get('role'))
-        
-        if request.args.get('is_active'):
-            is_active = request.args.get('is_active').lower() == 'true'
-            query = query.filter_by(is_active=is_active)
+        role = args.get('role')
+        if role:
+            query = query.filter_by(role=role)
+            filtered = True
+
+        is_active_raw = args.get('is_active')
+        if is_active_raw:
+            query = query.filter_by(is_active=is_active_raw.lower() == 'true')
+            filtered = True
         
         # Pagination
-        page = int(request.args.get('page', 1))
-        per_page = int(request.args.get('per_page', 20))
-        
-        pagination = query.order_by(User.created_at.desc()).paginate(
+        page, per_page = get_pagination_args()
+
+        # Keyset pagination: seeks straight to (created_at, id) via the
+        # composite index and skips the COUNT(*), so deep pages cost the
+        # same as the first one
+        if cursor is not None:
+            rows = (
+                query
+                .filter(tuple_(User.created_at, User.id) <
+                        (cursor_created_at, cursor_id))
+                .order_by(User.created_at.desc(), User.id.desc())
+                .limit(per_page + 1)
+                .all()
+            )
+            has_more = len(rows) > per_page
+            rows = rows[:per_page]
+
+            return jsonify({
+                'items': [user.to_fast_dict() for user in rows],
+                'pagination': {
+                    'per_page': per_page,
+                    'has_more': has_more,
+                    'next_cursor': _encode_user_cursor(rows[-1]) if has_more else None
+                }
+            }), 200
+
+        # Unfiltered listings take the total from InnoDB statistics
+        # (O(1)) instead of a COUNT(*) scan over the clustered index
+        pagination = query.order_by(
+            User.created_at.desc(), User.id.desc()
+        ).paginate(
             page=page,
             per_page=per_page,
-            error_out=False
+            error_out=False,
+            count=filtered
         )
-        
+        total = pagination.total if filtered else approx_row_count('users')
+
         return jsonify({
-            'items': users_schema.dump(pagination.items),
+            'items': [user.to_fast_dict() for user in pagination.items],
             'pagination': {
                 'page': pagination.page,
                 'per_page': pagination.per_page,
-                'total': pagination.total,
-                'pages': pagination.pages
+                'total': total,
+                'pages': -(-total // per_page) if total else 0,
+                'next_cursor': (_encode_user_cursor(pagination.items[-1])
+                                if pagination.items else None)
             }
         }), 200
     
@@ -92,7 +167,7 @@ def get_user(user_id):
     try:
         # Get current user
         current_user_id = get_jwt_identity()
-        current_user = auth_service.get_current_user(current_user_id)
+        current_user = auth_service.get_current_user_brief(current_user_id)
         
         # Check permission (admin or viewing own profile)
         if not auth_service.check_permission(current_user, 'admin') and current_user_id != user_id:
@@ -101,14 +176,17 @@ def get_user(user_id):
                 'message': 'Insufficient permissions to view this user'
             })), 403
         
-        user = User.query.get(user_id)
-        
+        # session.get consults the identity map before emitting SQL;
+        # no_autoflush skips the flush scan on this read-only path
+        with db.session.no_autoflush:
+            user = db.session.get(User, user_id)
+
         if not user:
             return jsonify(error_schema.dump({
                 'error': 'not_found',
                 'message': f'User with ID {user_id} not found'
             })), 404
-        
+
         return jsonify(user_schema.dump(user)), 200
     
     except Exception as err:
@@ -135,10 +213,10 @@ def update_user(user_id):
     try:
         # Get current user
         current_user_id = get_jwt_identity()
-        current_user = auth_service.get_current_user(current_user_id)
+        current_user = auth_service.get_current_user_brief(current_user_id)
         
         # Get target user
-        user = User.query.get(user_id)
+        user = db.session.get(User, user_id)
         if not user:
             return jsonify(error_schema.dump({
                 'error': 'not_found',
@@ -166,28 +244,35 @@ def update_user(user_id):
                     'message': 'Only admins can change role or active status'
                 })), 403
         
-        # Update fields
+        # Update fields; email uniqueness is enforced by the unique
+        # index at commit time instead of a racy pre-SELECT
         if 'email' in data:
-            # Check for duplicate email
-            existing = User.query.filter_by(email=data['email']).first()
-            if existing and existing.id != user_id:
-                return jsonify(error_schema.dump({
-                    'error': 'validation_error',
-                    'message': 'Email already in use'
-                })), 400
             user.email = data['email']
-        
+
         if 'role' in data and is_admin:
             user.role = data['role']
-        
+
         if 'is_active' in data and is_admin:
             user.is_active = data['is_active']
-        
+
         if 'password' in data:
             user.set_password(data['password'])
-        
-        db.session.commit()
-        
+
+        try:
+            db.session.commit()
+        except IntegrityError:
+            db.session.rollback()
+            return jsonify(error_schema.dump({
+                'error': 'validation_error',
+                'message': 'Email already in use'
+            })), 400
+
+        # Drop the cached brief so role/is_active changes apply on the
+        # target's next request
+        auth_service.invalidate_user_brief(user_id)
+
+        bump_cache_version('users')
+
         return jsonify(user_schema.dump(user)), 200
     
     except ValidationError as err:
@@ -216,7 +301,7 @@ def delete_user(user_id):
     try:
         # Get current user
         current_user_id = get_jwt_identity()
-        current_user = auth_service.get_current_user(current_user_id)
+        current_user = auth_service.get_current_user_brief(current_user_id)
         
         # Check permission
         if not auth_service.check_permission(current_user, 'admin'):
@@ -233,7 +318,7 @@ def delete_user(user_id):
             })), 403
         
         # Get user
-        user = User.query.get(user_id)
+        user = db.session.get(User, user_id)
         if not user:
             return jsonify(error_schema.dump({
                 'error': 'not_found',
@@ -243,7 +328,11 @@ def delete_user(user_id):
         # Hard delete (cascade will delete associated jobs)
         db.session.delete(user)
         db.session.commit()
-        
+
+        auth_service.invalidate_user_brief(user_id)
+
+        bump_cache_version('users')
+
         return jsonify({'message': 'User and associated jobs deleted successfully'}), 200
     
     except Exception as err:
@@ -4,6 +4,7 @@ Manages environment-based configuration for development, testing, and production
 """
 import os
 from datetime import timedelta
+from functools import lru_cache
 
 
 class Config:
@@ -36,11 +37,20 @@ class Config:
     # Celery Configuration
     CELERY_BROKER_URL = os.getenv('CELERY_BROKER_URL', 'redis://localhost:6379/0')
     CELERY_RESULT_BACKEND = os.getenv('CELERY_RESULT_BACKEND', 'redis://localhost:6379/0')
+
+    # Response Cache
+    CACHE_TYPE = 'RedisCache'
+    CACHE_REDIS_URL = os.getenv('CACHE_REDIS_URL', 'redis://localhost:6379/1')
+    CACHE_DEFAULT_TIMEOUT = 30
     
     # File Storage (Linux-compatible paths)
     UPLOAD_FOLDER = os.getenv('UPLOAD_FOLDER', '/var/lib/infra-automation/playbooks')
     MAX_CONTENT_LENGTH = 16 * 1024 * 1024  # 16MB max file size
     ALLOWED_EXTENSIONS = {'yml', 'yaml'}
+    # Playbook blob storage backend: 'local' or 's3' (needs boto3 and
+    # a bucket)
+    PLAYBOOK_STORAGE_BACKEND = os.getenv('PLAYBOOK_STORAGE_BACKEND', 'local')
+    PLAYBOOK_S3_BUCKET = os.getenv('PLAYBOOK_S3_BUCKET')
     
     # Ansible Runner Configuration
     ANSIBLE_RUNNER_DIR = os.getenv('ANSIBLE_RUNNER_DIR', '/var/lib/infra-automation/ansible-runner')
@@ -50,6 +60,9 @@ class Config:
     # Security
     BCRYPT_LOG_ROUNDS = 12
     PASSWORD_MIN_LENGTH = 8
+    # Cache successful password verifications for 5 minutes so repeated
+    # logins with the same credentials skip the bcrypt work
+    USE_VERIFY_PASSWORD_CACHE = True
     
     # CORS Configuration
     CORS_ORIGINS = os.getenv('CORS_ORIGINS', 'http://localhost:5173').split(',')
@@ -58,10 +71,16 @@ class Config:
     # Pagination
     DEFAULT_PAGE_SIZE = 20
     MAX_PAGE_SIZE = 100
+
+    # Monitoring
+    MONITOR_MAX_WORKERS = int(os.getenv('MONITOR_MAX_WORKERS', '32'))
     
     # Logging
     LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO')
     LOG_FILE = os.getenv('LOG_FILE', '/var/log/infra-automation/app.log')
+    # When logrotate(8) manages the log file, use a WatchedFileHandler
+    # instead of rotating in-process
+    LOG_ROTATE_EXTERNAL = os.getenv('LOG_ROTATE_EXTERNAL', 'false').lower() == 'true'
 
 
 class DevelopmentConfig(Config):
@@ -78,6 +97,7 @@ class TestingConfig(Config):
     """Testing environment configuration"""
     TESTING = True
     SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'
+    CACHE_TYPE = 'SimpleCache'
     CELERY_TASK_ALWAYS_EAGER = True
     CELERY_TASK_EAGER_PROPAGATES = True
     UPLOAD_FOLDER = '/tmp/test_playbooks'
@@ -89,6 +109,20 @@ class ProductionConfig(Config):
     """Production environment configuration"""
     # Override with stricter production settings
     SQLALCHEMY_POOL_SIZE = 20
+    # pre_ping adds a SELECT 1 round-trip to every checkout; recycling
+    # connections well under MySQL's wait_timeout makes stale sockets
+    # rare enough that failing fast (short pymysql timeouts) is the
+    # cheaper guard
+    SQLALCHEMY_POOL_PRE_PING = False
+    SQLALCHEMY_POOL_RECYCLE = 1500
+    SQLALCHEMY_ENGINE_OPTIONS = {
+        'pool_size': 20,
+        'max_overflow': 40,
+        'pool_timeout': 5,
+        'pool_recycle': 1500,
+        'pool_pre_ping': False,
+        'connect_args': {'read_timeout': 5, 'write_timeout': 5},
+    }
     JWT_ACCESS_TOKEN_EXPIRES = timedelta(minutes=30)
     BCRYPT_LOG_ROUNDS = 14
 
@@ -101,8 +135,15 @@ config = {
 }
 
 
+@lru_cache(maxsize=4)
 def get_config(env=None):
-    """Get configuration based on environment"""
+    """
+    Get configuration based on environment
+
+    Cached per env name: the class attributes are all resolved at
+    import time, so repeated calls (app factory, Celery workers, hot
+    paths like check_password) reduce to a dict hit.
+    """
     if env is None:
         env = os.getenv('FLASK_ENV', 'development')
     return config.get(env, config['default'])
@@ -2,11 +2,13 @@
 Flask Extensions Initialization
 Centralizes extension instances for the application
 """
+from concurrent.futures import ThreadPoolExecutor
 from flask_sqlalchemy import SQLAlchemy
 from flask_migrate import Migrate
 from flask_jwt_extended import JWTManager
 from flask_cors import CORS
 from flask_marshmallow import Marshmallow
+from flask_caching import Cache
 from celery import Celery
 import redis
 
@@ -16,6 +18,11 @@ migrate = Migrate()
 jwt = JWTManager()
 cors = CORS()
 ma = Marshmallow()
+cache = Cache()
+
+# Shared pool for password hashing; bcrypt releases the GIL in its C
+# code, so hashing here lets concurrent requests overlap
+hash_pool = ThreadPoolExecutor(max_workers=4, thread_name_prefix='pwhash')
 
 # Redis client for direct access if needed
 redis_client = None
@@ -52,7 +59,10 @@ def init_extensions(app):
     
     # Marshmallow
     ma.init_app(app)
-    
+
+    # Response cache
+    cache.init_app(app)
+
     # Redis client
     global redis_client
     redis_client = redis.from_url(app.config['CELERY_BROKER_URL'])
@@ -10,11 +10,103 @@ Storage Engine: InnoDB
 
 See DATABASE_DESIGN.md for comprehensive documentation
 """
+import hashlib
+import threading
 from datetime import datetime
 from app.extensions import db
-from sqlalchemy import Index, event, text
+from sqlalchemy import Index, text
 from sqlalchemy.orm import validates
 import bcrypt
+from argon2 import PasswordHasher
+from argon2.exceptions import VerifyMismatchError
+from cachetools import TTLCache
+
+# argon2id gives equivalent security to bcrypt at our cost factor for a
+# fraction of the CPU time. Legacy bcrypt hashes ('$2...') still verify
+# and are rehashed opportunistically on successful login, as are argon2
+# hashes minted under older parameters (check_needs_rehash).
+# OWASP-aligned: 3 passes over 64 MiB with 4 lanes.
+_ph = PasswordHasher(time_cost=3, memory_cost=65536, parallelism=4)
+
+# Verified-password cache: bcrypt verification costs 100-400ms of pure
+# CPU per call at our cost factor, and token refreshes replay the same
+# credentials within minutes. Only successful verifications are cached
+# (a miss always falls through to bcrypt), keyed on a digest of
+# hash+password so neither appears in memory as a dict key, and entries
+# die with the hash (set_password) or the 5 minute TTL.
+_PWD_CACHE = TTLCache(maxsize=4096, ttl=300)
+_PWD_CACHE_LOCK = threading.Lock()
+
+# Hash used to burn KDF time when the username doesn't exist; built
+# lazily so importing the module stays cheap
+_DUMMY_HASH = None
+
+
+def dummy_verify(password):
+    """
+    Run a verification that always fails, at full KDF cost
+
+    Called on the unknown-username login path so response timing does
+    not reveal whether an account exists, and so worst-case login
+    latency equals the known-user case.
+    """
+    global _DUMMY_HASH
+    if _DUMMY_HASH is None:
+        _DUMMY_HASH = _ph.hash('infra-ansible-dummy')
+    try:
+        _ph.verify(_DUMMY_HASH, password)
+    except VerifyMismatchError:
+        pass
+    return False
+
+
+def approx_row_count(table_name):
+    """
+    Estimate a table's row count without scanning it
+
+    On MySQL, information_schema.tables.table_rows is an O(1) InnoDB
+    statistics read — accurate enough for pagination totals in admin
+    listings. Falls back to an exact COUNT(*) on other engines (sqlite
+    in tests). The estimate is cached in Redis for 30 seconds.
+
+    Args:
+        table_name: Table to estimate
+
+    Returns:
+        Approximate number of rows (int)
+    """
+    from app.extensions import redis_client
+
+    cache_key = f'approx_count:{table_name}'
+    if redis_client is not None:
+        try:
+            cached = redis_client.get(cache_key)
+            if cached is not None:
+                return int(cached)
+        except Exception:
+            pass
+
+    value = None
+    if db.engine.name == 'mysql':
+        value = db.session.execute(
+            text('SELECT table_rows FROM information_schema.tables '
+                 'WHERE table_schema = DATABASE() AND table_name = :t'),
+            {'t': table_name}
+        ).scalar()
+
+    if value is None:
+        # table_name comes from code, never from request input
+        value = db.session.execute(
+            text(f'SELECT COUNT(*) FROM {table_name}')
+        ).scalar()
+
+    value = int(value or 0)
+    if redis_client is not None:
+        try:
+            redis_client.setex(cache_key, 30, value)
+        except Exception:
+            pass
+    return value
 
 
 class User(db.Model):
@@ -32,17 +124,69 @@ class User(db.Model):
     last_login = db.Column(db.DateTime, nullable=True)
     
     # Relationships
-    jobs = db.relationship('Job', back_populates='user', lazy='dynamic', cascade='all, delete-orphan')
-    tickets = db.relationship('Ticket', back_populates='created_by_user', lazy='dynamic', cascade='all, delete-orphan')
-    audit_logs = db.relationship('AuditLog', back_populates='user', lazy='dynamic', cascade='all, delete-orphan')
-    
+    # passive_deletes: deleting a user is one DELETE statement; InnoDB
+    # cascades jobs/tickets (ON DELETE CASCADE) and nulls audit_logs
+    # (ON DELETE SET NULL) without the ORM loading each collection
+    jobs = db.relationship('Job', back_populates='user', lazy='dynamic', cascade='all, delete-orphan', passive_deletes=True)
+    tickets = db.relationship('Ticket', back_populates='created_by_user', lazy='dynamic', cascade='all, delete-orphan', passive_deletes=True)
+    audit_logs = db.relationship('AuditLog', back_populates='user', lazy='dynamic', passive_deletes='all')
+
+    __table_args__ = (
+        # Serves keyset pagination over (created_at, id) in the users
+        # listing
+        Index('idx_user_created_id', 'created_at', 'id'),
+        # Serves the role/is_active filters ordered by newest first;
+        # the descending created_at lets MySQL 8 read the ORDER BY
+        # straight off the index without a filesort
+        Index('idx_user_role_active_created',
+              'role', 'is_active', text('created_at DESC')),
+    )
+
     def set_password(self, password):
-        """Hash and set password"""
-        self.password_hash = bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
-    
+        """Hash and set password (argon2id)"""
+        old_hash = self.password_hash
+        self.password_hash = _ph.hash(password)
+        if old_hash:
+            # Drop any cached verifications tied to the replaced hash
+            prefix = hashlib.sha256(old_hash.encode('utf-8')).digest()[:16]
+            with _PWD_CACHE_LOCK:
+                for key in [k for k in _PWD_CACHE if k[:16] == prefix]:
+                    _PWD_CACHE.pop(key, None)
+
+    def _verify_password(self, password):
+        """Run the KDF: argon2id, or bcrypt for legacy '$2...' hashes"""
+        if self.password_hash.startswith('$2'):
+            return bcrypt.checkpw(password.encode('utf-8'),
+                                  self.password_hash.encode('utf-8'))
+        try:
+            return _ph.verify(self.password_hash, password)
+        except VerifyMismatchError:
+            return False
+
     def check_password(self, password):
         """Verify password against hash"""
-        return bcrypt.checkpw(password.encode('utf-8'), self.password_hash.encode('utf-8'))
+        from app.config import get_config
+        if not get_config().USE_VERIFY_PASSWORD_CACHE:
+            return self._verify_password(password)
+
+        hash_bytes = self.password_hash.encode('utf-8')
+        key = (hashlib.sha256(hash_bytes).digest()[:16]
+               + hashlib.sha256(hash_bytes + b'|' + password.encode('utf-8')).digest())
+        with _PWD_CACHE_LOCK:
+            if key in _PWD_CACHE:
+                return True
+
+        result = self._verify_password(password)
+        if result:
+            with _PWD_CACHE_LOCK:
+                _PWD_CACHE[key] = True
+        return result
+
+    def needs_password_rehash(self):
+        """True when the stored hash predates the current argon2 setup"""
+        if self.password_hash.startswith('$2'):
+            return True
+        return _ph.check_needs_rehash(self.password_hash)
     
     @validates('email')
     def validate_email(self, key, email):
@@ -50,7 +194,26 @@ class User(db.Model):
         if '@' not in email:
             raise ValueError('Invalid email address')
         return email.lower()
-    
+
+    def to_fast_dict(self):
+        """
+        Plain-dict serialization matching UserSchema's dump output
+
+        Used on the list endpoints where per-row marshmallow field
+        dispatch dominates; keep the keys in sync with the schema.
+        Never includes password_hash.
+        """
+        return {
+            'id': self.id,
+            'username': self.username,
+            'email': self.email,
+            'role': self.role,
+            'is_active': self.is_active,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'updated_at': self.updated_at.isoformat() if self.updated_at else None,
+            'last_login': self.last_login.isoformat() if self.last_login else None,
+        }
+
     def __repr__(self):
         return f'<User {self.username} ({self.role})>'
 
@@ -67,6 +230,9 @@ class Server(db.Model):
     ssh_port = db.Column(db.Integer, default=22, nullable=False)
     ssh_user = db.Column(db.String(50), nullable=False, default='root')
     ssh_key_path = db.Column(db.String(500), nullable=True)  # Path to private key
+    tags = db.Column(db.JSON, nullable=True)  # Arbitrary key/value labels
+    environment = db.Column(db.String(50), nullable=True)  # e.g., dev, staging, prod
+    description = db.Column(db.Text, nullable=True)
     is_active = db.Column(db.Boolean, default=True, nullable=False)
     cpu_usage = db.Column(db.Float, nullable=True, default=0.0)  # CPU usage percentage (0-100)
     memory_usage = db.Column(db.Float, nullable=True, default=0.0)  # Memory usage percentage (0-100)
@@ -77,7 +243,41 @@ class Server(db.Model):
     
     # Relationships
     jobs = db.relationship('Job', back_populates='server', lazy='dynamic')
-    
+
+    __table_args__ = (
+        # Matches idx_servers_active_env in schema.sql; serves the
+        # combined is_active + environment list filter
+        Index('idx_servers_active_env', 'is_active', 'environment'),
+    )
+
+    def to_fast_dict(self):
+        """
+        Plain-dict serialization matching ServerSchema's dump output
+
+        Used on the list endpoints where per-row marshmallow field
+        dispatch dominates; keep the keys in sync with the schema.
+        """
+        return {
+            'id': self.id,
+            'hostname': self.hostname,
+            'ip_address': self.ip_address,
+            'os_type': self.os_type,
+            'os_version': self.os_version,
+            'ssh_port': self.ssh_port,
+            'ssh_user': self.ssh_user,
+            'ssh_key_path': self.ssh_key_path,
+            'tags': self.tags,
+            'environment': self.environment,
+            'description': self.description,
+            'is_active': self.is_active,
+            'cpu_usage': self.cpu_usage,
+            'memory_usage': self.memory_usage,
+            'disk_usage': self.disk_usage,
+            'last_monitored': self.last_monitored.isoformat() if self.last_monitored else None,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'updated_at': self.updated_at.isoformat() if self.updated_at else None,
+        }
+
     def __repr__(self):
         return f'<Server {self.hostname} ({self.ip_address})>'
 
@@ -90,13 +290,45 @@ class Playbook(db.Model):
     name = db.Column(db.String(255), unique=True, nullable=False, index=True)
     description = db.Column(db.Text, nullable=True)
     file_path = db.Column(db.String(500), nullable=False)  # Linux filesystem path
+    file_hash = db.Column(db.String(64), nullable=True)  # SHA256 checksum
+    file_mtime = db.Column(db.BigInteger, nullable=True)  # st_mtime_ns at last hash
+    tags = db.Column(db.JSON, nullable=True)
+    variables = db.Column(db.JSON, nullable=True)  # Default Ansible variables
     is_active = db.Column(db.Boolean, default=True, nullable=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
-    
+
+    __table_args__ = (
+        # Serves the default active listing and the keyset cursor path
+        # in index order, no filesort
+        Index('idx_playbook_active_created_id', 'is_active',
+              text('created_at DESC'), text('id DESC')),
+    )
+
     # Relationships
     jobs = db.relationship('Job', back_populates='playbook', lazy='dynamic')
-    
+
+    def to_fast_dict(self):
+        """
+        Plain-dict serialization matching PlaybookSchema's dump output
+
+        Used on the list endpoints where per-row marshmallow field
+        dispatch dominates; keep the keys in sync with the schema.
+        """
+        return {
+            'id': self.id,
+            'name': self.name,
+            'description': self.description,
+            'file_path': self.file_path,
+            'file_hash': self.file_hash,
+            'file_mtime': self.file_mtime,
+            'tags': self.tags,
+            'variables': self.variables,
+            'is_active': self.is_active,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'updated_at': self.updated_at.isoformat() if self.updated_at else None,
+        }
+
     def __repr__(self):
         return f'<Playbook {self.name}>'
 
@@ -107,9 +339,11 @@ class Job(db.Model):
     
     id = db.Column(db.Integer, primary_key=True)
     job_id = db.Column(db.String(36), unique=True, nullable=False, index=True)  # UUID
-    playbook_id = db.Column(db.Integer, db.ForeignKey('playbooks.id'), nullable=False, index=True)
+    # Nullable: hard-deleting a playbook detaches its jobs rather than
+    # deleting the execution history
+    playbook_id = db.Column(db.Integer, db.ForeignKey('playbooks.id', ondelete='SET NULL'), nullable=True, index=True)
     server_id = db.Column(db.Integer, db.ForeignKey('servers.id'), nullable=False, index=True)
-    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False, index=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id', ondelete='CASCADE'), nullable=False, index=True)
     status = db.Column(
         db.Enum('pending', 'running', 'success', 'failed', 'cancelled', name='job_status'),
         nullable=False,
@@ -119,6 +353,9 @@ class Job(db.Model):
     celery_task_id = db.Column(db.String(255), nullable=True, index=True)
     extra_vars = db.Column(db.JSON, nullable=True)  # Runtime variables
     error_message = db.Column(db.Text, nullable=True)
+    # Denormalized counter maintained by the log-insert paths; an O(1)
+    # read replaces COUNT(*) over job_logs
+    log_count = db.Column(db.Integer, nullable=False, default=0, server_default=text('0'))
     started_at = db.Column(db.DateTime, nullable=True)
     completed_at = db.Column(db.DateTime, nullable=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
@@ -127,12 +364,14 @@ class Job(db.Model):
     playbook = db.relationship('Playbook', back_populates='jobs')
     server = db.relationship('Server', back_populates='jobs')
     user = db.relationship('User', back_populates='jobs')
-    logs = db.relationship('JobLog', back_populates='job', lazy='dynamic', cascade='all, delete-orphan')
-    tickets = db.relationship('Ticket', back_populates='job', lazy='dynamic', cascade='all, delete-orphan')
+    logs = db.relationship('JobLog', back_populates='job', lazy='dynamic', cascade='all, delete-orphan', passive_deletes=True)
+    tickets = db.relationship('Ticket', back_populates='job', lazy='dynamic', cascade='all, delete-orphan', passive_deletes=True)
     
     __table_args__ = (
         Index('idx_job_status_created', 'status', 'created_at'),
         Index('idx_job_user_status', 'user_id', 'status'),
+        # Serves the user-filtered listing ordered by newest first
+        Index('idx_job_user_created', 'user_id', 'created_at'),
     )
     
     def __repr__(self):
@@ -178,8 +417,8 @@ class Ticket(db.Model):
     
     id = db.Column(db.Integer, primary_key=True)
     ticket_id = db.Column(db.String(36), unique=True, nullable=False, index=True)  # UUID
-    job_id = db.Column(db.Integer, db.ForeignKey('jobs.id'), nullable=False, index=True)
-    created_by = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    job_id = db.Column(db.Integer, db.ForeignKey('jobs.id', ondelete='CASCADE'), nullable=False, index=True)
+    created_by = db.Column(db.Integer, db.ForeignKey('users.id', ondelete='CASCADE'), nullable=False)
     title = db.Column(db.String(255), nullable=False)
     description = db.Column(db.Text, nullable=True)
     status = db.Column(
@@ -238,13 +477,3 @@ class AuditLog(db.Model):
     
     def __repr__(self):
         return f'<AuditLog {self.action} on {self.resource_type}>'
-
-
-# Event listeners for automatic timestamp updates
-@event.listens_for(User, 'before_update')
-@event.listens_for(Server, 'before_update')
-@event.listens_for(Playbook, 'before_update')
-@event.listens_for(Ticket, 'before_update')
-def receive_before_update(mapper, connection, target):
-    """Automatically update updated_at timestamp"""
-    target.updated_at = datetime.utcnow()
@@ -265,3 +265,12 @@ audit_logs_schema = AuditLogSchema(many=True)
 audit_log_query_schema = AuditLogQuerySchema()
 
 error_schema = ErrorSchema()
+
+# Warm the dump path of the hot list/detail schemas once at import.
+# marshmallow resolves and binds fields lazily on first use; doing it
+# here moves that cost to process startup instead of the first request.
+for _schema in (users_schema, servers_schema, playbooks_schema,
+                jobs_schema, job_logs_schema, tickets_schema,
+                audit_logs_schema):
+    _schema.dump([])
+del _schema
@@ -0,0 +1,106 @@
+"""
+Audit Service
+Background writer that batches audit inserts off the request path
+"""
+import atexit
+import queue
+import threading
+from app.extensions import db
+from app.models import AuditLog
+
+
+class AuditWriter:
+    """
+    Daemon-thread audit writer
+
+    Audit rows are not needed for request correctness, so services
+    enqueue plain dicts here instead of adding an INSERT to the request
+    transaction. A single daemon thread drains the queue and writes up
+    to BATCH_SIZE rows per Core multi-row insert, amortizing commits
+    across events. Enqueue failures (writer not started, queue full)
+    return False so callers can fall back to a synchronous write.
+    """
+
+    BATCH_SIZE = 200
+    POLL_TIMEOUT = 0.1
+
+    def __init__(self, maxsize=10000):
+        self._queue = queue.Queue(maxsize=maxsize)
+        self._thread = None
+        self._app = None
+        self._stop = threading.Event()
+
+    def start(self, app):
+        """
+        Start the writer thread (idempotent)
+
+        Safe to call again after fork: the parent's thread does not
+        exist in the child, so a dead thread is replaced.
+        """
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._app = app
+        self._thread = threading.Thread(
+            target=self._run, name='audit-writer', daemon=True
+        )
+        self._thread.start()
+        atexit.register(self.stop)
+
+    def enqueue(self, row):
+        """
+        Queue one audit row for background insertion
+
+        Args:
+            row: Dict of AuditLog column values
+
+        Returns:
+            True if queued; False if the caller should write
+            synchronously instead
+        """
+        if self._thread is None:
+            return False
+        try:
+            self._queue.put_nowait(row)
+            return True
+        except queue.Full:
+            return False
+
+    def stop(self):
+        """Stop the writer, draining anything still queued"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+
+    def _run(self):
+        with self._app.app_context():
+            while not (self._stop.is_set() and self._queue.empty()):
+                batch = self._drain()
+                if batch:
+                    self._write(batch)
+
+    def _drain(self):
+        """Block briefly for the first row, then sweep up to a batch"""
+        batch = []
+        try:
+            batch.append(self._queue.get(timeout=self.POLL_TIMEOUT))
+        except queue.Empty:
+            return batch
+        while len(batch) < self.BATCH_SIZE:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _write(self, rows):
+        try:
+            db.session.execute(AuditLog.__table__.insert(), rows)
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+        finally:
+            db.session.remove()
+
+
+# Singleton instance; started from the app factory
+audit_writer = AuditWriter()
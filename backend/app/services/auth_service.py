@@ -2,16 +2,78 @@
 Authentication Service
 Handles user authentication, JWT token generation, and authorization
 """
-from datetime import datetime
-from flask_jwt_extended import create_access_token, create_refresh_token, get_jwt_identity
-from app.extensions import db
-from app.models import User, AuditLog
+from collections import namedtuple
+from datetime import datetime, timedelta
+from functools import lru_cache
+from cachetools import TTLCache
+from sqlalchemy import bindparam, or_, select
+from sqlalchemy.exc import IntegrityError
+from flask_jwt_extended import (create_access_token, create_refresh_token,
+                                get_jwt, get_jwt_identity)
+from app.extensions import db, hash_pool
+from app.models import User, AuditLog, dummy_verify
+from app.services.audit_service import audit_writer
 from marshmallow import ValidationError
 
+# Role levels are fixed at import time; built once instead of per check
+_ROLE_HIERARCHY = {'viewer': 1, 'operator': 2, 'admin': 3}
+
+# Lightweight projection of a user row for permission checks; detached
+# from the session on purpose so cached copies carry no ORM state
+UserBrief = namedtuple('UserBrief', ('id', 'username', 'role', 'is_active'))
+
+# Built once at import so the per-request hot lookup skips ORM query
+# construction; the engine's compiled-SQL cache then serves the same
+# cache key on every execution
+_USER_BY_ID = select(User).where(User.id == bindparam('uid'))
+
+
+@lru_cache(maxsize=32)
+def _has_permission(role, required_role):
+    """Compare two role names against the fixed hierarchy"""
+    user_level = _ROLE_HIERARCHY.get(role, 0)
+    required_level = _ROLE_HIERARCHY.get(required_role, 99)
+    return user_level >= required_level
+
 
 class AuthService:
     """Service for authentication operations"""
-    
+
+    # JWT-identity -> UserBrief cache. The same admin token hits
+    # get_current_user on every request; a 5 second TTL turns that into
+    # one SELECT per token per 5s without letting role or deactivation
+    # changes go stale for longer than a poll interval. Kept on the
+    # service so tests can flush it.
+    user_brief_cache = TTLCache(maxsize=2048, ttl=5)
+
+    @staticmethod
+    def get_current_user_brief(user_id):
+        """
+        Get a cached lightweight view of a user for permission checks
+
+        Args:
+            user_id: User ID from JWT (string)
+
+        Returns:
+            UserBrief namedtuple or None
+        """
+        user_id = int(user_id)
+        brief = AuthService.user_brief_cache.get(user_id)
+        if brief is None:
+            row = db.session.query(
+                User.id, User.username, User.role, User.is_active
+            ).filter(User.id == user_id).first()
+            if row is None:
+                return None
+            brief = UserBrief(*row)
+            AuthService.user_brief_cache[user_id] = brief
+        return brief
+
+    @staticmethod
+    def invalidate_user_brief(user_id):
+        """Drop a cached UserBrief after the user row changes"""
+        AuthService.user_brief_cache.pop(int(user_id), None)
+
     @staticmethod
     def register_user(username, email, password, role='viewer'):
         """
@@ -29,13 +91,16 @@ class AuthService:
         Raises:
             ValueError: If user already exists or validation fails
         """
-        # Check if user exists
-        if User.query.filter_by(username=username).first():
-            raise ValueError(f"Username '{username}' already exists")
-        
-        if User.query.filter_by(email=email).first():
+        # One column-only SELECT covers both uniqueness checks; the
+        # unique indexes remain the definitive guard at commit below
+        existing = db.session.query(User.username, User.email).filter(
+            or_(User.username == username, User.email == email)
+        ).first()
+        if existing:
+            if existing.username == username:
+                raise ValueError(f"Username '{username}' already exists")
             raise ValueError(f"Email '{email}' already registered")
-        
+
         # Create new user
         user = User(
             username=username,
@@ -43,12 +108,15 @@ class AuthService:
             role=role,
             is_active=True
         )
-        user.set_password(password)
+        # Hash on the shared pool so the KDF's CPU burn overlaps with
+        # other requests on this worker
+        hash_pool.submit(user.set_password, password).result()
         
         db.session.add(user)
-        db.session.commit()
-        
-        # Create audit log
+        # Flush to assign user.id, then commit the user and its audit
+        # row together — one fsync instead of two
+        db.session.flush()
+
         AuthService._create_audit_log(
             user_id=user.id,
             action='CREATE',
@@ -56,7 +124,16 @@ class AuthService:
             resource_id=user.id,
             details={'username': username, 'role': role}
         )
-        
+        try:
+            db.session.commit()
+        except IntegrityError as exc:
+            # Concurrent registration won the race between the check
+            # above and this commit
+            db.session.rollback()
+            raise ValueError(
+                f"Username '{username}' or email '{email}' already registered"
+            ) from exc
+
         return user
     
     @staticmethod
@@ -78,53 +155,86 @@ class AuthService:
         """
         # Find user
         user = User.query.filter_by(username=username).first()
-        
-        if not user or not user.check_password(password):
-            # Create failed login audit log
+
+        if user:
+            password_ok = hash_pool.submit(user.check_password, password).result()
+        else:
+            # Burn the same KDF cost so timing can't enumerate usernames
+            password_ok = hash_pool.submit(dummy_verify, password).result()
+
+        if not password_ok:
+            # Failed logins stay synchronous: throttling reads these
+            # rows, so they must be committed before the 401 goes out
             AuthService._create_audit_log(
                 user_id=None,
                 action='LOGIN_FAILED',
                 resource_type='user',
                 details={'username': username, 'reason': 'invalid_credentials'},
                 ip_address=ip_address,
-                user_agent=user_agent
+                user_agent=user_agent,
+                sync=True
             )
+            db.session.commit()
             raise ValueError("Invalid username or password")
         
         if not user.is_active:
             raise ValueError("User account is disabled")
-        
-        # Update last login
-        user.last_login = datetime.utcnow()
-        db.session.commit()
-        
-        # Generate tokens
+
+        # Legacy bcrypt hash verified: upgrade it to argon2id while the
+        # plaintext is in hand
+        dirty = False
+        if user.needs_password_rehash():
+            hash_pool.submit(user.set_password, password).result()
+            dirty = True
+
+        # Update last login, downsampled to once per hour: the column
+        # feeds "last seen" displays, not auditing (the LOGIN audit row
+        # below covers that), so most logins can skip the write+fsync
+        now = datetime.utcnow()
+        if user.last_login is None or (now - user.last_login) > timedelta(hours=1):
+            user.last_login = now
+            dirty = True
+
+        # Single commit covers the rehash and last_login together
+        if dirty:
+            db.session.commit()
+
+        # Generate tokens; both carry the same identity and claims
+        identity = str(user.id)
+        claims = {
+            'username': user.username,
+            'role': user.role
+        }
         access_token = create_access_token(
-            identity=str(user.id),
-            additional_claims={
-                'username': user.username,
-                'role': user.role
-            }
+            identity=identity,
+            additional_claims=claims
         )
-        
         refresh_token = create_refresh_token(
-            identity=str(user.id),
-            additional_claims={
-                'username': user.username,
-                'role': user.role
-            }
+            identity=identity,
+            additional_claims=claims
         )
         
-        # Create successful login audit log
-        AuthService._create_audit_log(
-            user_id=user.id,
-            action='LOGIN',
-            resource_type='user',
-            resource_id=user.id,
-            details={'username': username},
-            ip_address=ip_address,
-            user_agent=user_agent
-        )
+        # Record the successful login audit off the request path; failed
+        # logins above stay synchronous so throttling can rely on them
+        try:
+            from app.extensions import celery
+            celery.send_task(
+                'app.tasks.record_login_audit',
+                args=[user.id, username, ip_address, user_agent]
+            )
+        except Exception:
+            # Broker unavailable: fall back to the in-process writer
+            queued = AuthService._create_audit_log(
+                user_id=user.id,
+                action='LOGIN',
+                resource_type='user',
+                resource_id=user.id,
+                details={'username': username},
+                ip_address=ip_address,
+                user_agent=user_agent
+            )
+            if not queued:
+                db.session.commit()
         
         return {
             'access_token': access_token,
@@ -141,9 +251,11 @@ class AuthService:
             New access token
         """
         current_user_id = get_jwt_identity()
-        # Convert string ID back to integer for database query
-        user = User.query.get(int(current_user_id))
-        
+        # The cached brief carries everything the new token needs
+        # (id, username, role, is_active), so token refreshes within the
+        # TTL window skip the DB entirely
+        user = AuthService.get_current_user_brief(current_user_id)
+
         if not user or not user.is_active:
             raise ValueError("Invalid user or account disabled")
         
@@ -169,7 +281,9 @@ class AuthService:
             User object or None
         """
         # Convert string ID to integer for database query
-        return User.query.get(int(user_id))
+        return db.session.execute(
+            _USER_BY_ID, {'uid': int(user_id)}
+        ).scalar_one_or_none()
     
     @staticmethod
     def change_password(user_id, old_password, new_password):
@@ -192,9 +306,8 @@ class AuthService:
             raise ValueError("Current password is incorrect")
         
         user.set_password(new_password)
-        db.session.commit()
-        
-        # Create audit log
+
+        # Audit row rides in the same transaction as the hash update
         AuthService._create_audit_log(
             user_id=user.id,
             action='PASSWORD_CHANGE',
@@ -202,7 +315,10 @@ class AuthService:
             resource_id=user.id,
             details={'username': user.username}
         )
-    
+        db.session.commit()
+
+        AuthService.invalidate_user_brief(user.id)
+
     @staticmethod
     def check_permission(user, required_role):
         """
@@ -215,18 +331,32 @@ class AuthService:
         Returns:
             Boolean indicating if user has permission
         """
-        role_hierarchy = {'viewer': 1, 'operator': 2, 'admin': 3}
-        user_level = role_hierarchy.get(user.role, 0)
-        required_level = role_hierarchy.get(required_role, 99)
-        
-        return user_level >= required_level
-    
+        return _has_permission(user.role, required_role)
+
+    @staticmethod
+    def check_permission_from_jwt(required_role):
+        """
+        Check the required role against the JWT's embedded role claim
+
+        Access tokens carry the role claim set at login, so
+        authorization needs no user row at all. Must be called inside
+        a @jwt_required context.
+
+        Args:
+            required_role: Required role level
+
+        Returns:
+            Boolean indicating if the token's role has permission
+        """
+        return _has_permission(get_jwt().get('role'), required_role)
+
     @staticmethod
-    def _create_audit_log(user_id, action, resource_type, resource_id=None, 
-                         details=None, ip_address=None, user_agent=None):
+    def _create_audit_log(user_id, action, resource_type, resource_id=None,
+                         details=None, ip_address=None, user_agent=None,
+                         sync=False):
         """
         Create audit log entry
-        
+
         Args:
             user_id: User ID performing action
             action: Action type
@@ -235,18 +365,31 @@ class AuthService:
             details: Additional details
             ip_address: Client IP
             user_agent: Client user agent
+            sync: Write in the caller's transaction instead of handing
+                the row to the background writer
+
+        Returns:
+            True if the row was queued for the background writer; False
+            if it was added to the session and rides the caller's commit
         """
-        audit_log = AuditLog(
-            user_id=user_id,
-            action=action,
-            resource_type=resource_type,
-            resource_id=resource_id,
-            details=details,
-            ip_address=ip_address,
-            user_agent=user_agent
-        )
-        db.session.add(audit_log)
-        db.session.commit()
+        row = {
+            'user_id': user_id,
+            'action': action,
+            'resource_type': resource_type,
+            'resource_id': resource_id,
+            'details': details,
+            'ip_address': ip_address,
+            'user_agent': user_agent,
+            # Capture the event time here; the queue adds write latency
+            'timestamp': datetime.utcnow()
+        }
+        if not sync and audit_writer.enqueue(row):
+            return True
+        # Synchronous path (requested, writer not running, or queue
+        # full): add only, so the caller's commit flushes the audit row
+        # together with the business row it describes
+        db.session.add(AuditLog(**row))
+        return False
 
 
 # Singleton instance
@@ -2,40 +2,69 @@
 Job Service
 Handles job execution, tracking, and log management
 """
+import json
 import uuid
 from datetime import datetime
+from cachetools import TTLCache
 from app.extensions import db
 from app.models import Job, JobLog, Ticket, AuditLog, Server, Playbook
-from sqlalchemy import or_
+from app.services.audit_service import audit_writer
+from sqlalchemy import case, or_, select, func
+from sqlalchemy.orm import selectinload
+
+
+# Job counts per filter combination, cached for a few seconds so
+# dashboards polling the list don't re-issue COUNT(*) on every hit.
+# Bounded with eviction: the keys embed client-supplied filter values,
+# so an unbounded dict could be grown without limit.
+_count_cache = TTLCache(maxsize=1024, ttl=5)
+
+# Single-line log writes buffer in a Redis list per job and reach the
+# database in batches of this size, instead of one INSERT+fsync per
+# line. The buffer is also drained when the job goes terminal.
+_LOG_BUFFER_THRESHOLD = 50
+_LOG_BUFFER_TTL = 3600
+
+# Built once at import; the engine's compiled-SQL cache then serves
+# the same cache key for every single-row and bulk log insert
+_JOBLOG_INSERT = JobLog.__table__.insert()
 
 
 class JobService:
     """Service for job execution and management"""
     
     @staticmethod
-    def create_job(playbook_id, server_id, user_id, extra_vars=None):
+    def create_job(playbook_id, server_id, user_id, extra_vars=None,
+                   celery_task_id=None):
         """
         Create a new job for execution
-        
+
         Args:
             playbook_id: Playbook ID to execute
             server_id: Target server ID
             user_id: User ID creating the job
             extra_vars: Extra variables for playbook execution
-        
+            celery_task_id: Pre-generated Celery task ID, if known
+
         Returns:
             Created job object
-        
+
         Raises:
             ValueError: If validation fails
         """
-        # Validate playbook exists and is active
-        playbook = Playbook.query.get(playbook_id)
+        # Validate playbook and server with column-only lookups — the
+        # audit log needs just name/hostname, so skip hydrating full ORM
+        # objects. (One combined query isn't possible: they're separate
+        # tables with no join between them here.)
+        playbook = db.session.query(
+            Playbook.id, Playbook.name, Playbook.is_active
+        ).filter(Playbook.id == playbook_id).first()
         if not playbook or not playbook.is_active:
             raise ValueError(f"Playbook with ID {playbook_id} not found or inactive")
-        
-        # Validate server exists and is active
-        server = Server.query.get(server_id)
+
+        server = db.session.query(
+            Server.id, Server.hostname, Server.is_active
+        ).filter(Server.id == server_id).first()
         if not server or not server.is_active:
             raise ValueError(f"Server with ID {server_id} not found or inactive")
         
@@ -49,13 +78,15 @@ class JobService:
             server_id=server_id,
             user_id=user_id,
             status='pending',
+            celery_task_id=celery_task_id,
             extra_vars=extra_vars or {}
         )
         
         db.session.add(job)
-        db.session.commit()
-        
-        # Create audit log
+        # Flush to assign job.id, then commit the job and its audit row
+        # together — one fsync instead of two
+        db.session.flush()
+
         JobService._create_audit_log(
             user_id=user_id,
             action='CREATE',
@@ -66,7 +97,8 @@ class JobService:
                 'server': server.hostname
             }
         )
-        
+        db.session.commit()
+
         return job
     
     @staticmethod
@@ -80,8 +112,27 @@ class JobService:
         Returns:
             Job object or None
         """
-        return Job.query.get(job_id)
-    
+        # Identity-map aware: a repeat lookup within the same request
+        # (e.g. existence check followed by serialization) is a dict hit
+        return db.session.get(Job, job_id)
+
+    @staticmethod
+    def job_exists(job_id):
+        """
+        Check whether a job exists without materializing the row
+
+        For endpoints that only gate on existence (the log readers),
+        a single-column scalar avoids the full ORM load — no entity
+        construction, no identity-map entry.
+
+        Args:
+            job_id: Job internal ID
+
+        Returns:
+            Boolean
+        """
+        return db.session.query(Job.id).filter_by(id=job_id).scalar() is not None
+
     @staticmethod
     def get_job_by_uuid(job_uuid):
         """
@@ -108,27 +159,75 @@ class JobService:
         Returns:
             Paginated job query result
         """
-        query = Job.query
-        
-        if filters:
-            if filters.get('status'):
-                query = query.filter_by(status=filters['status'])
-            
-            if filters.get('playbook_id'):
-                query = query.filter_by(playbook_id=filters['playbook_id'])
-            
-            if filters.get('server_id'):
-                query = query.filter_by(server_id=filters['server_id'])
-            
-            if filters.get('user_id'):
-                query = query.filter_by(user_id=filters['user_id'])
-        
+        # Eager-load the relationships the list serializer touches so a
+        # page of jobs costs four queries instead of 3N+1
+        query = JobService._filtered_query(filters)
+
         return query.order_by(Job.created_at.desc()).paginate(
             page=page,
             per_page=per_page,
             error_out=False
         )
     
+    @staticmethod
+    def _filtered_query(filters=None):
+        """Build the base jobs query with eager loads and filters applied"""
+        query = Job.query.options(
+            selectinload(Job.playbook),
+            selectinload(Job.server),
+            selectinload(Job.user)
+        )
+
+        if filters:
+            for key in ('status', 'playbook_id', 'server_id', 'user_id'):
+                if filters.get(key):
+                    query = query.filter_by(**{key: filters[key]})
+
+        return query
+
+    @staticmethod
+    def get_all_jobs_keyset(filters=None, cursor_id=None, per_page=20):
+        """
+        Get a page of jobs using keyset pagination
+
+        Seeking on the primary key costs O(per_page) regardless of how
+        deep the client has paged, unlike OFFSET which scans and
+        discards every earlier row.
+
+        Args:
+            filters: Dictionary with filter criteria
+            cursor_id: Return jobs with id below this value
+            per_page: Items per page
+
+        Returns:
+            List of jobs in descending id order
+        """
+        query = JobService._filtered_query(filters)
+
+        if cursor_id:
+            query = query.filter(Job.id < cursor_id)
+
+        return query.order_by(Job.id.desc()).limit(per_page).all()
+
+    @staticmethod
+    def get_jobs_count(filters=None):
+        """
+        Get the job count for a filter combination, cached briefly
+
+        Args:
+            filters: Dictionary with filter criteria
+
+        Returns:
+            Total number of matching jobs
+        """
+        key = tuple(sorted(filters.items())) if filters else ()
+
+        total = _count_cache.get(key)
+        if total is None:
+            total = JobService._filtered_query(filters).count()
+            _count_cache[key] = total
+        return total
+
     @staticmethod
     def update_job_status(job_id, status, error_message=None, celery_task_id=None):
         """
@@ -140,60 +239,126 @@ class JobService:
             error_message: Error message if failed
             celery_task_id: Celery task ID
         
-        Returns:
-            Updated job object
-        
         Raises:
             ValueError: If job not found
         """
-        job = Job.query.get(job_id)
-        if not job:
-            raise ValueError(f"Job with ID {job_id} not found")
-        
-        job.status = status
-        
+        # One conditional UPDATE instead of SELECT-then-UPDATE; this
+        # fires on every Celery task transition, so halving the
+        # round-trips matters. MySQL has no RETURNING, but the callers
+        # all ignore the row — rowcount alone confirms the job exists.
+        values = {'status': status}
+
         if celery_task_id:
-            job.celery_task_id = celery_task_id
-        
+            values['celery_task_id'] = celery_task_id
+
         if error_message:
-            job.error_message = error_message
-        
-        # Update timestamps based on status
-        if status == 'running' and not job.started_at:
-            job.started_at = datetime.utcnow()
-        
-        if status in ['success', 'failed', 'cancelled']:
-            job.completed_at = datetime.utcnow()
-        
+            values['error_message'] = error_message
+
+        # Timestamp logic pushed into the statement so the row never
+        # needs to be read first
+        now = datetime.utcnow()
+        if status == 'running':
+            values['started_at'] = case(
+                (Job.started_at.is_(None), now),
+                else_=Job.started_at
+            )
+
+        if status in ('success', 'failed', 'cancelled'):
+            values['completed_at'] = now
+
+        result = db.session.execute(
+            Job.__table__.update().where(Job.id == job_id).values(**values)
+        )
+        if result.rowcount == 0:
+            db.session.rollback()
+            raise ValueError(f"Job with ID {job_id} not found")
         db.session.commit()
-        
-        return job
+
+        # Terminal transition: drain any buffered log lines so the
+        # final view of the job is complete
+        if status in ('success', 'failed', 'cancelled'):
+            JobService.flush_job_log_buffer(job_id)
     
     @staticmethod
     def add_job_log(job_id, line_number, content, log_level='INFO'):
         """
         Add a log line to job
-        
+
+        Lines buffer in a per-job Redis list and reach the database in
+        batches via add_job_logs_bulk, so per-line callers don't pay a
+        commit+fsync each. Falls back to a direct insert when Redis is
+        unavailable.
+
         Args:
             job_id: Job ID
             line_number: Line number
             content: Log content
             log_level: Log level
-        
-        Returns:
-            Created log entry
         """
-        log_entry = JobLog(
-            job_id=job_id,
-            line_number=line_number,
-            content=content,
-            log_level=log_level
-        )
-        
-        db.session.add(log_entry)
+        from app.extensions import redis_client
+
+        if redis_client is not None:
+            try:
+                key = f'joblog:{job_id}'
+                pending = redis_client.rpush(key, json.dumps({
+                    'line_number': line_number,
+                    'content': content,
+                    'log_level': log_level
+                }))
+                # TTL so an abandoned buffer can't live forever
+                redis_client.expire(key, _LOG_BUFFER_TTL)
+                if pending >= _LOG_BUFFER_THRESHOLD:
+                    JobService.flush_job_log_buffer(job_id)
+                return
+            except Exception:
+                pass  # Redis down: take the direct path below
+
+        JobService._insert_job_log(job_id, line_number, content, log_level)
+
+    @staticmethod
+    def _insert_job_log(job_id, line_number, content, log_level):
+        """Insert a single log line directly (Redis-unavailable path)"""
+        # Core insert: no JobLog instance or unit-of-work bookkeeping
+        # for a row nothing ever reads back
+        db.session.execute(_JOBLOG_INSERT, {
+            'job_id': job_id,
+            'line_number': line_number,
+            'content': content,
+            'log_level': log_level
+        })
+        JobService._bump_log_count(job_id, 1)
         db.session.commit()
-        
-        return log_entry
+
+    @staticmethod
+    def flush_job_log_buffer(job_id):
+        """
+        Drain the Redis log buffer for a job into the database
+
+        Called when the buffer reaches the batch threshold and on every
+        terminal status transition, so no buffered lines are stranded.
+
+        Args:
+            job_id: Job ID
+        """
+        from app.extensions import redis_client
+
+        if redis_client is None:
+            return
+        try:
+            key = f'joblog:{job_id}'
+            # MULTI/EXEC so concurrent flushers can't double-insert
+            with redis_client.pipeline() as pipe:
+                pipe.lrange(key, 0, -1)
+                pipe.delete(key)
+                raw_lines, _ = pipe.execute()
+        except Exception:
+            return
+        if not raw_lines:
+            return
+
+        JobService.add_job_logs_bulk(
+            job_id, [json.loads(line) for line in raw_lines]
+        )
     
     @staticmethod
     def add_job_logs_bulk(job_id, logs):
@@ -204,19 +369,34 @@ class JobService:
             job_id: Job ID
             logs: List of log dictionaries
         """
-        log_entries = []
-        for log in logs:
-            log_entry = JobLog(
-                job_id=job_id,
-                line_number=log['line_number'],
-                content=log['content'],
-                log_level=log.get('log_level', 'INFO')
-            )
-            log_entries.append(log_entry)
-        
-        db.session.bulk_save_objects(log_entries)
+        if not logs:
+            return
+
+        # Core multi-row insert: one executemany with plain dicts, no
+        # per-row ORM object construction or unit-of-work bookkeeping
+        rows = [
+            {
+                'job_id': job_id,
+                'line_number': log['line_number'],
+                'content': log['content'],
+                'log_level': log.get('log_level', 'INFO')
+            }
+            for log in logs
+        ]
+        db.session.execute(_JOBLOG_INSERT, rows)
+        JobService._bump_log_count(job_id, len(rows))
         db.session.commit()
     
+    @staticmethod
+    def _bump_log_count(job_id, n):
+        """Increment the denormalized log counter inside the caller's
+        transaction"""
+        db.session.execute(
+            Job.__table__.update()
+            .where(Job.id == job_id)
+            .values(log_count=Job.log_count + n)
+        )
+
     @staticmethod
     def get_job_logs(job_id, start_line=None, limit=None):
         """
@@ -240,6 +420,72 @@ class JobService:
         
         return query.all()
     
+    @staticmethod
+    def get_job_logs_with_count(job_id, start_line=None, limit=None):
+        """
+        Get job logs and the total log count in a single query
+
+        The total is attached to each row as a scalar subquery so the
+        polling endpoint pays one DB round-trip instead of two.
+
+        Args:
+            job_id: Job ID
+            start_line: Starting line number
+            limit: Maximum number of lines
+
+        Returns:
+            Tuple of (list of log entries, total log count)
+        """
+        # The denormalized Job.log_count makes the total an O(1) read
+        total_subq = (
+            select(Job.log_count)
+            .where(Job.id == job_id)
+            .scalar_subquery()
+        )
+
+        stmt = select(JobLog, total_subq).where(JobLog.job_id == job_id)
+
+        if start_line:
+            stmt = stmt.where(JobLog.line_number >= start_line)
+
+        stmt = stmt.order_by(JobLog.line_number)
+
+        if limit:
+            stmt = stmt.limit(limit)
+
+        rows = db.session.execute(stmt).all()
+
+        if rows:
+            return [row[0] for row in rows], rows[0][1]
+
+        # No rows returned (empty window); fall back to a plain count
+        return [], JobService.get_job_logs_count(job_id)
+
+    @staticmethod
+    def iter_job_logs(job_id, start_line=None):
+        """
+        Iterate over job logs without materializing the full result set
+
+        Rows are fetched from the server in batches of 500 so streaming
+        a multi-megabyte log keeps memory flat.
+
+        Args:
+            job_id: Job ID
+            start_line: Starting line number
+
+        Yields:
+            JobLog entries in line order
+        """
+        stmt = select(JobLog).where(JobLog.job_id == job_id)
+
+        if start_line:
+            stmt = stmt.where(JobLog.line_number >= start_line)
+
+        stmt = stmt.order_by(JobLog.line_number).execution_options(
+            yield_per=500)
+
+        yield from db.session.execute(stmt).scalars()
+
     @staticmethod
     def get_job_logs_count(job_id):
         """
@@ -251,7 +497,7 @@ class JobService:
         Returns:
             Count of log entries
         """
-        return JobLog.query.filter_by(job_id=job_id).count()
+        return db.session.query(Job.log_count).filter_by(id=job_id).scalar() or 0
     
     @staticmethod
     def cancel_job(job_id, user_id):
@@ -268,10 +514,10 @@ class JobService:
         Raises:
             ValueError: If job not found
         """
-        job = Job.query.get(job_id)
+        job = db.session.get(Job, job_id)
         if not job:
             raise ValueError(f"Job with ID {job_id} not found")
-        
+
         # Allow deletion of jobs in any status
         
         # Store job info for audit log before deletion
@@ -292,7 +538,16 @@ class JobService:
         # Delete the job
         db.session.delete(job)
         db.session.commit()
-        
+
+        # Discard any log lines still buffered in Redis; flushing them
+        # now would insert against a deleted job
+        from app.extensions import redis_client
+        if redis_client is not None:
+            try:
+                redis_client.delete(f'joblog:{job_id}')
+            except Exception:
+                pass
+
         return job
     
     @staticmethod
@@ -313,10 +568,10 @@ class JobService:
         Raises:
             ValueError: If job not found
         """
-        job = Job.query.get(job_id)
+        job = db.session.get(Job, job_id)
         if not job:
             raise ValueError(f"Job with ID {job_id} not found")
-        
+
         # Generate unique ticket ID
         ticket_id = str(uuid.uuid4())
         
@@ -332,16 +587,16 @@ class JobService:
         )
         
         db.session.add(ticket)
-        db.session.commit()
-        
-        # Create audit log
+
+        # Audit row rides in the same transaction as the ticket
         JobService._create_audit_log(
             user_id=user_id,
             action='CREATE_TICKET',
             resource_id=job.id,
             details={'ticket_id': ticket_id, 'job_id': job.job_id}
         )
-        
+        db.session.commit()
+
         return ticket
     
     @staticmethod
@@ -355,47 +610,61 @@ class JobService:
         Returns:
             Dictionary with statistics
         """
-        query = Job.query
+        # One GROUP BY scan instead of six COUNT(*) queries; the
+        # (user_id, status) composite index keeps the filtered variant
+        # index-only
+        query = db.session.query(Job.status, func.count(Job.id))
         if user_id:
-            query = query.filter_by(user_id=user_id)
-        
-        total = query.count()
-        pending = query.filter_by(status='pending').count()
-        running = query.filter_by(status='running').count()
-        success = query.filter_by(status='success').count()
-        failed = query.filter_by(status='failed').count()
-        cancelled = query.filter_by(status='cancelled').count()
-        
+            query = query.filter(Job.user_id == user_id)
+
+        counts = dict(query.group_by(Job.status).all())
+        total = sum(counts.values())
+        failed = counts.get('failed', 0)
+
         return {
             'total': total,
-            'pending': pending,
-            'running': running,
-            'success': success,
+            'pending': counts.get('pending', 0),
+            'running': counts.get('running', 0),
+            'success': counts.get('success', 0),
             'failed': failed,
-            'cancelled': cancelled,
+            'cancelled': counts.get('cancelled', 0),
             'success_rate': round(((total - failed) / total * 100), 2) if total > 0 else 0
         }
     
     @staticmethod
-    def _create_audit_log(user_id, action, resource_id, details=None):
+    def _create_audit_log(user_id, action, resource_id, details=None,
+                          sync=False):
         """
         Create audit log entry for job operations
-        
+
         Args:
             user_id: User ID performing action
             action: Action type
             resource_id: Job ID
             details: Additional details
+            sync: Write in the caller's transaction instead of handing
+                the row to the background writer
+
+        Returns:
+            True if the row was queued for the background writer; False
+            if it was added to the session and rides the caller's commit
         """
-        audit_log = AuditLog(
-            user_id=user_id,
-            action=action,
-            resource_type='job',
-            resource_id=resource_id,
-            details=details
-        )
-        db.session.add(audit_log)
-        db.session.commit()
+        row = {
+            'user_id': user_id,
+            'action': action,
+            'resource_type': 'job',
+            'resource_id': resource_id,
+            'details': details,
+            # Capture the event time here; the queue adds write latency
+            'timestamp': datetime.utcnow()
+        }
+        if not sync and audit_writer.enqueue(row):
+            return True
+        # Synchronous path (requested, writer not running, or queue
+        # full): add only, so the caller's commit flushes the audit row
+        # together with the business row it describes
+        db.session.add(AuditLog(**row))
+        return False
 
 
 # Singleton instance
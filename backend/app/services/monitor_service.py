@@ -4,8 +4,10 @@ Fetches real-time metrics from remote servers via SSH
 """
 import paramiko
 import re
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime
 from typing import Dict, Optional
+from app.config import get_config
 from app.models import Server
 from app.extensions import db
 
@@ -165,14 +167,73 @@ class ServerMonitor:
         
         return metrics
     
+    @staticmethod
+    def collect_metrics(server: Server) -> Dict[str, Optional[float]]:
+        """
+        Collect metrics for a server without touching the database
+
+        Safe to run on a worker thread: only reads already-loaded
+        attributes and performs SSH I/O.
+        """
+        return {
+            'cpu_usage': ServerMonitor.get_cpu_usage(server),
+            'memory_usage': ServerMonitor.get_memory_usage(server),
+            'disk_usage': ServerMonitor.get_disk_usage(server)
+        }
+
+    @staticmethod
+    def update_servers(servers):
+        """
+        Refresh metrics for the given servers concurrently
+
+        SSH collection is I/O-bound, so it fans out across a bounded
+        thread pool; database writes stay on the calling thread and are
+        flushed in a single commit. Wall time drops from N * latency to
+        roughly latency * N / workers.
+
+        Args:
+            servers: List of Server objects
+
+        Returns:
+            Dictionary of hostname -> metrics
+        """
+        if not servers:
+            return {}
+
+        max_workers = getattr(get_config(), 'MONITOR_MAX_WORKERS', 32)
+        results = {}
+
+        with ThreadPoolExecutor(max_workers=min(len(servers), max_workers)) as pool:
+            futures = {
+                pool.submit(ServerMonitor.collect_metrics, server): server
+                for server in servers
+            }
+            for future in as_completed(futures):
+                server = futures[future]
+                try:
+                    metrics = future.result()
+                except Exception:
+                    metrics = {'cpu_usage': None, 'memory_usage': None,
+                               'disk_usage': None}
+                results[server.hostname] = metrics
+
+                if metrics['cpu_usage'] is not None:
+                    server.cpu_usage = metrics['cpu_usage']
+                if metrics['memory_usage'] is not None:
+                    server.memory_usage = metrics['memory_usage']
+                if metrics['disk_usage'] is not None:
+                    server.disk_usage = metrics['disk_usage']
+                server.last_monitored = datetime.utcnow()
+
+        try:
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+
+        return results
+
     @staticmethod
     def update_all_servers():
         """Update metrics for all active servers"""
         servers = Server.query.filter_by(is_active=True).all()
-        results = {}
-        
-        for server in servers:
-            print(f"Updating metrics for {server.hostname}...")
-            results[server.hostname] = ServerMonitor.update_server_metrics(server)
-        
-        return results
+        return ServerMonitor.update_servers(servers)
@@ -4,11 +4,38 @@ Handles playbook management, upload, and storage
 """
 import os
 import hashlib
+import re
+import secrets
+from datetime import datetime
+import yaml
+try:
+    # libyaml's C parser is ~5-10x faster than the pure-Python one
+    from yaml import CSafeLoader as _YamlLoader
+except ImportError:  # pragma: no cover - libyaml not available
+    from yaml import SafeLoader as _YamlLoader
+from sqlalchemy import tuple_
+from sqlalchemy.exc import IntegrityError
 from werkzeug.utils import secure_filename
 from app.extensions import db
 from app.models import Playbook, AuditLog
+from app.services.audit_service import audit_writer
+from app.services.storage import get_storage
 from app.config import get_config
 
+# Upload streaming buffer: one of these is the peak memory cost of a
+# playbook upload, regardless of file size
+_UPLOAD_CHUNK_SIZE = 65536
+
+# Allowed upload extensions, identical across config environments, so
+# resolve them once into a frozenset at import
+_ALLOWED_EXTENSIONS = frozenset(
+    ext.lower() for ext in get_config().ALLOWED_EXTENSIONS
+)
+
+# Distinguishes "attribute missing" from any real value in
+# update_playbook's change tracking
+_SENTINEL = object()
+
 
 class PlaybookService:
     """Service for playbook operations"""
@@ -30,11 +57,6 @@ class PlaybookService:
         Raises:
             ValueError: If validation fails
         """
-        # Check if playbook with same name exists
-        existing = Playbook.query.filter_by(name=name).first()
-        if existing:
-            raise ValueError(f"Playbook with name '{name}' already exists")
-        
         # Validate file
         if not file_obj or not PlaybookService._allowed_file(file_obj.filename):
             raise ValueError("Invalid file type. Only .yml and .yaml files are allowed")
@@ -51,26 +73,44 @@ class PlaybookService:
         unique_filename = f"{base_name}_{PlaybookService._generate_unique_id()}{ext}"
         file_path = os.path.join(upload_folder, unique_filename)
         
-        # Save file
-        file_obj.save(file_path)
-        
-        # Set Linux file permissions (readable only by owner and group)
-        try:
-            os.chmod(file_path, 0o640)
-        except Exception:
-            pass  # Permissions may not work on all systems during development
-        
-        # Create playbook record
+        # The backend streams the upload in 64KB chunks, enforcing the
+        # size cap as the bytes arrive and folding the sha256 digest
+        # into the same pass, so an oversized upload stops at the limit
+        # and the file is never re-read for hashing
+        storage = get_storage()
+        written, file_hash = storage.put(
+            file_path, file_obj.stream, max_bytes=config.MAX_CONTENT_LENGTH
+        )
+
+        if written == 0:
+            storage.delete(file_path)
+            raise ValueError("Uploaded playbook file is empty")
+
+        # Create playbook record with the digest computed during the
+        # write and the backend's mtime, so integrity checks can
+        # short-circuit on stat()
         playbook = Playbook(
             name=name,
             description=description,
             file_path=file_path,
+            file_hash=file_hash,
+            file_mtime=storage.mtime_ns(file_path),
             is_active=True
         )
         
         db.session.add(playbook)
-        db.session.commit()
-        
+        # The unique index on name is the definitive duplicate check:
+        # no pre-SELECT round trip, and no race window with concurrent
+        # uploads of the same name
+        try:
+            db.session.commit()
+        except IntegrityError as exc:
+            db.session.rollback()
+            storage.delete(file_path)
+            raise ValueError(
+                f"Playbook with name '{name}' already exists"
+            ) from exc
+
         # Create audit log
         if user_id:
             PlaybookService._create_audit_log(
@@ -93,30 +133,51 @@ class PlaybookService:
         Returns:
             Playbook object or None
         """
-        return Playbook.query.get(playbook_id)
+        return db.session.get(Playbook, playbook_id)
     
     @staticmethod
-    def get_all_playbooks(filters=None, page=1, per_page=20):
+    def get_all_playbooks(filters=None, page=1, per_page=20, cursor=None):
         """
         Get all playbooks with optional filtering and pagination
-        
+
         Args:
             filters: Dictionary with filter criteria
-            page: Page number
+            page: Page number (ignored when cursor is given)
             per_page: Items per page
-        
+            cursor: Optional (created_at, id) keyset cursor; when given,
+                returns up to per_page + 1 rows strictly older than it
+                instead of a page object, skipping both OFFSET and the
+                COUNT(*) that paginate issues
+
         Returns:
-            Paginated playbook query result
+            Paginated playbook query result, or a list of Playbook rows
+            when cursor is given
         """
         query = Playbook.query
-        
+
         # Default to only active playbooks unless explicitly specified
         if filters is None or filters.get('is_active') is None:
             query = query.filter_by(is_active=True)
-        elif filters.get('is_active') is not None:
+        else:
             query = query.filter_by(is_active=filters['is_active'])
-            
-            if filters.get('search'):
+
+        # Search applies regardless of the is_active filter and runs in
+        # SQL so only matching rows leave the database
+        if filters and filters.get('search'):
+            if db.engine.dialect.name == 'mysql':
+                # Word-prefix probe against the FULLTEXT index on
+                # (name, description); a %term% LIKE can't use any
+                # btree and scans the whole table. Boolean-mode
+                # operators are stripped from the user input first.
+                words = re.sub(r'[+\-><()~*"@]+', ' ', filters['search']).split()
+                if words:
+                    query = query.filter(db.text(
+                        'MATCH(name, description) '
+                        'AGAINST(:term IN BOOLEAN MODE)'
+                    ).bindparams(term=' '.join(f'{w}*' for w in words)))
+            else:
+                # Dialects without the FULLTEXT index keep the
+                # substring scan
                 search_term = f"%{filters['search']}%"
                 query = query.filter(
                     db.or_(
@@ -124,7 +185,18 @@ class PlaybookService:
                         Playbook.description.ilike(search_term)
                     )
                 )
-        
+
+        if cursor is not None:
+            created_at, last_id = cursor
+            return (
+                query
+                .filter(tuple_(Playbook.created_at, Playbook.id) <
+                        (created_at, last_id))
+                .order_by(Playbook.created_at.desc(), Playbook.id.desc())
+                .limit(per_page + 1)
+                .all()
+            )
+
         return query.order_by(Playbook.created_at.desc()).paginate(
             page=page,
             per_page=per_page,
@@ -147,20 +219,23 @@ class PlaybookService:
         Raises:
             ValueError: If playbook not found
         """
-        playbook = Playbook.query.get(playbook_id)
+        playbook = db.session.get(Playbook, playbook_id)
         if not playbook:
             raise ValueError(f"Playbook with ID {playbook_id} not found")
         
-        # Track changes for audit
+        # Track changes for audit; one getattr per field instead of
+        # three (hasattr, comparison, old-value capture)
         changes = {}
         for key, value in data.items():
-            if hasattr(playbook, key) and getattr(playbook, key) != value:
-                changes[key] = {'old': getattr(playbook, key), 'new': value}
-                setattr(playbook, key, value)
-        
-        db.session.commit()
-        
-        # Create audit log
+            old = getattr(playbook, key, _SENTINEL)
+            if old is _SENTINEL or old == value:
+                continue
+            changes[key] = {'old': old, 'new': value}
+            setattr(playbook, key, value)
+
+        # Audit before commit: if the writer queue forces the sync
+        # fallback, its commit persists the mutation and the audit row
+        # together; otherwise this commit covers the mutation alone
         if changes:
             PlaybookService._create_audit_log(
                 user_id=user_id,
@@ -168,9 +243,57 @@ class PlaybookService:
                 resource_id=playbook.id,
                 details={'name': playbook.name, 'changes': changes}
             )
-        
+        db.session.commit()
+
         return playbook
     
+    @staticmethod
+    def update_playbook_content(playbook_id, content, user_id=None):
+        """
+        Replace a playbook's file content atomically
+
+        The storage backend replaces the object in one step (a rename
+        on local disk), so readers always see either the old or the new
+        content and a crash mid-write cannot corrupt the playbook.
+
+        Args:
+            playbook_id: Playbook ID
+            content: New YAML content string
+            user_id: ID of user updating the content
+
+        Returns:
+            Updated playbook object
+
+        Raises:
+            ValueError: If playbook not found
+        """
+        playbook = db.session.get(Playbook, playbook_id)
+        if not playbook:
+            raise ValueError(f"Playbook with ID {playbook_id} not found")
+
+        # Reject malformed YAML before touching the file
+        try:
+            yaml.load(content, Loader=_YamlLoader)
+        except yaml.YAMLError as exc:
+            raise ValueError(f"Invalid YAML content: {exc}")
+
+        storage = get_storage()
+        # put_text hashes the content already in memory instead of
+        # re-reading what it just wrote
+        playbook.file_hash = storage.put_text(playbook.file_path, content)
+        playbook.file_mtime = storage.mtime_ns(playbook.file_path)
+        db.session.commit()
+
+        if user_id:
+            PlaybookService._create_audit_log(
+                user_id=user_id,
+                action='UPDATE_CONTENT',
+                resource_id=playbook.id,
+                details={'name': playbook.name}
+            )
+
+        return playbook
+
     @staticmethod
     def delete_playbook(playbook_id, user_id):
         """
@@ -183,7 +306,7 @@ class PlaybookService:
         Raises:
             ValueError: If playbook not found
         """
-        playbook = Playbook.query.get(playbook_id)
+        playbook = db.session.get(Playbook, playbook_id)
         if not playbook:
             raise ValueError(f"Playbook with ID {playbook_id} not found")
         
@@ -210,7 +333,7 @@ class PlaybookService:
         Raises:
             ValueError: If playbook not found
         """
-        playbook = Playbook.query.get(playbook_id)
+        playbook = db.session.get(Playbook, playbook_id)
         if not playbook:
             raise ValueError(f"Playbook with ID {playbook_id} not found")
         
@@ -221,22 +344,25 @@ class PlaybookService:
         from app.models import Job
         Job.query.filter_by(playbook_id=playbook_id).update({'playbook_id': None})
         
-        # Delete file
-        if os.path.exists(file_path):
-            try:
-                os.remove(file_path)
-            except Exception as e:
-                raise ValueError(f"Failed to delete playbook file: {str(e)}")
+        # Delete the stored file; already-gone is fine, anything else
+        # aborts
+        try:
+            get_storage().delete(file_path)
+        except OSError as e:
+            raise ValueError(f"Failed to delete playbook file: {str(e)}")
         
         db.session.delete(playbook)
         db.session.commit()
         
         # Create audit log
+        # Destructive and irreversible: this audit row must be durable
+        # before we return, so bypass the background writer
         PlaybookService._create_audit_log(
             user_id=user_id,
             action='HARD_DELETE',
             resource_id=playbook_id,
-            details={'name': name, 'file_path': file_path}
+            details={'name': name, 'file_path': file_path},
+            sync=True
         )
     
     @staticmethod
@@ -253,16 +379,51 @@ class PlaybookService:
         Raises:
             ValueError: If playbook not found or file doesn't exist
         """
-        playbook = Playbook.query.get(playbook_id)
+        playbook = db.session.get(Playbook, playbook_id)
         if not playbook:
             raise ValueError(f"Playbook with ID {playbook_id} not found")
         
-        if not os.path.exists(playbook.file_path):
+        # try/open instead of exists+open: one syscall, no race window
+        try:
+            with get_storage().get(playbook.file_path) as f:
+                return f.read().decode('utf-8')
+        except FileNotFoundError:
             raise ValueError(f"Playbook file not found: {playbook.file_path}")
-        
-        with open(playbook.file_path, 'r') as f:
-            return f.read()
     
+    @staticmethod
+    def iter_playbook_content(playbook_id, chunk_size=_UPLOAD_CHUNK_SIZE):
+        """
+        Stream playbook file content in chunks
+
+        Validation happens eagerly so callers get ValueError before the
+        response starts; only the reads are deferred. Peak memory per
+        concurrent reader is one chunk instead of the whole file.
+
+        Args:
+            playbook_id: Playbook ID
+            chunk_size: Bytes per yielded chunk
+
+        Returns:
+            Iterator of bytes chunks
+
+        Raises:
+            ValueError: If playbook not found or file doesn't exist
+        """
+        playbook = db.session.get(Playbook, playbook_id)
+        if not playbook:
+            raise ValueError(f"Playbook with ID {playbook_id} not found")
+
+        try:
+            f = get_storage().get(playbook.file_path)
+        except FileNotFoundError:
+            raise ValueError(f"Playbook file not found: {playbook.file_path}")
+
+        def _iter():
+            with f:
+                yield from iter(lambda: f.read(chunk_size), b'')
+
+        return _iter()
+
     @staticmethod
     def verify_playbook_integrity(playbook_id):
         """
@@ -274,12 +435,34 @@ class PlaybookService:
         Returns:
             Boolean indicating if file is intact
         """
-        playbook = Playbook.query.get(playbook_id)
-        if not playbook or not os.path.exists(playbook.file_path):
+        playbook = db.session.get(Playbook, playbook_id)
+        if not playbook:
             return False
-        
-        current_hash = PlaybookService._calculate_file_hash(playbook.file_path)
-        return current_hash == playbook.file_hash
+
+        # Unchanged mtime means the content is the one we hashed at
+        # write time; on local storage the check collapses to a single
+        # stat() syscall. Backends without cheap stat (None mtime) fall
+        # through to the hash comparison.
+        storage = get_storage()
+        mtime_ns = storage.mtime_ns(playbook.file_path)
+        if (mtime_ns is not None and playbook.file_mtime is not None
+                and mtime_ns == playbook.file_mtime):
+            return True
+
+        try:
+            current_hash = PlaybookService._calculate_file_hash(
+                playbook.file_path
+            )
+        except FileNotFoundError:
+            return False
+        if current_hash == playbook.file_hash:
+            # Content intact; remember the new mtime to keep future
+            # checks on the fast path
+            playbook.file_mtime = mtime_ns
+            db.session.commit()
+            return True
+
+        return False
     
     @staticmethod
     def _allowed_file(filename):
@@ -292,58 +475,68 @@ class PlaybookService:
         Returns:
             Boolean
         """
-        config = get_config()
-        allowed_extensions = config.ALLOWED_EXTENSIONS
-        return '.' in filename and \
-               filename.rsplit('.', 1)[1].lower() in allowed_extensions
+        ext = os.path.splitext(filename)[1].lower().lstrip('.')
+        return bool(ext) and ext in _ALLOWED_EXTENSIONS
     
     @staticmethod
     def _calculate_file_hash(file_path):
         """
-        Calculate SHA256 hash of file
-        
+        Calculate SHA256 hash of a stored file
+
         Args:
-            file_path: Path to file
-        
+            file_path: Storage key
+
         Returns:
             Hex string of file hash
         """
-        sha256_hash = hashlib.sha256()
-        with open(file_path, "rb") as f:
-            for byte_block in iter(lambda: f.read(4096), b""):
-                sha256_hash.update(byte_block)
-        return sha256_hash.hexdigest()
+        with get_storage().get(file_path) as f:
+            if hasattr(f, 'fileno'):
+                # file_digest hashes in C against OpenSSL's SHA-NI
+                # backend, but needs a real file descriptor
+                return hashlib.file_digest(f, "sha256").hexdigest()
+            digest = hashlib.sha256()
+            while chunk := f.read(_UPLOAD_CHUNK_SIZE):
+                digest.update(chunk)
+            return digest.hexdigest()
     
     @staticmethod
     def _generate_unique_id():
         """
         Generate unique identifier for filename
-        
+
         Returns:
-            Unique string
+            8-hex-char string (32 bits of entropy)
         """
-        import uuid
-        return str(uuid.uuid4())[:8]
+        return secrets.token_hex(4)
     
     @staticmethod
-    def _create_audit_log(user_id, action, resource_id, details=None):
+    def _create_audit_log(user_id, action, resource_id, details=None,
+                          sync=False):
         """
         Create audit log entry for playbook operations
-        
+
         Args:
             user_id: User ID performing action
             action: Action type
             resource_id: Playbook ID
             details: Additional details
+            sync: Commit the row immediately instead of handing it to
+                the background writer
         """
-        audit_log = AuditLog(
-            user_id=user_id,
-            action=action,
-            resource_type='playbook',
-            resource_id=resource_id,
-            details=details
-        )
-        db.session.add(audit_log)
+        row = {
+            'user_id': user_id,
+            'action': action,
+            'resource_type': 'playbook',
+            'resource_id': resource_id,
+            'details': details,
+            # Capture the event time here; the queue adds write latency
+            'timestamp': datetime.utcnow()
+        }
+        if not sync and audit_writer.enqueue(row):
+            return
+        # Synchronous path (requested, writer not running, or queue
+        # full): callers have already committed their own work
+        db.session.add(AuditLog(**row))
         db.session.commit()
 
 
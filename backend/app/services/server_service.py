@@ -2,8 +2,10 @@
 Server Service
 Handles server inventory CRUD operations
 """
+from datetime import datetime
 from app.extensions import db
 from app.models import Server, AuditLog
+from app.services.audit_service import audit_writer
 from sqlalchemy import or_
 
 
@@ -254,24 +256,33 @@ class ServerService:
         return servers
     
     @staticmethod
-    def _create_audit_log(user_id, action, resource_id, details=None):
+    def _create_audit_log(user_id, action, resource_id, details=None,
+                          sync=False):
         """
         Create audit log entry for server operations
-        
+
         Args:
             user_id: User ID performing action
             action: Action type
             resource_id: Server ID
             details: Additional details
+            sync: Commit the row immediately instead of handing it to
+                the background writer
         """
-        audit_log = AuditLog(
-            user_id=user_id,
-            action=action,
-            resource_type='server',
-            resource_id=resource_id,
-            details=details
-        )
-        db.session.add(audit_log)
+        row = {
+            'user_id': user_id,
+            'action': action,
+            'resource_type': 'server',
+            'resource_id': resource_id,
+            'details': details,
+            # Capture the event time here; the queue adds write latency
+            'timestamp': datetime.utcnow()
+        }
+        if not sync and audit_writer.enqueue(row):
+            return
+        # Synchronous path (requested, writer not running, or queue
+        # full): callers have already committed their own work
+        db.session.add(AuditLog(**row))
         db.session.commit()
 
 
@@ -0,0 +1,184 @@
+"""
+Playbook Storage Backends
+Pluggable blob storage so playbook files can live off the app node
+"""
+import hashlib
+import os
+import tempfile
+from functools import lru_cache
+
+from app.config import get_config
+
+try:
+    import boto3
+except ImportError:  # pragma: no cover - optional dependency
+    boto3 = None
+
+_CHUNK_SIZE = 65536
+
+
+class LocalStorage:
+    """
+    Playbook files on the local filesystem
+
+    Keys are paths joined onto the configured upload folder; absolute
+    keys (the form existing rows store) pass through unchanged.
+    """
+
+    def __init__(self, base_dir):
+        self.base_dir = base_dir
+
+    def _path(self, key):
+        return os.path.join(self.base_dir, key)
+
+    def put(self, key, stream, max_bytes=None):
+        """
+        Stream an upload into storage, hashing as the bytes arrive
+
+        Args:
+            key: Storage key
+            stream: Readable binary stream
+            max_bytes: Optional size cap enforced mid-stream
+
+        Returns:
+            Tuple of (bytes_written, sha256 hexdigest)
+
+        Raises:
+            ValueError: If the stream exceeds max_bytes (the partial
+                object is removed)
+        """
+        path = self._path(key)
+        written = 0
+        digest = hashlib.sha256()
+        try:
+            with open(path, 'wb') as out:
+                while chunk := stream.read(_CHUNK_SIZE):
+                    written += len(chunk)
+                    if max_bytes is not None and written > max_bytes:
+                        raise ValueError(
+                            f"File exceeds maximum size of {max_bytes} bytes"
+                        )
+                    out.write(chunk)
+                    digest.update(chunk)
+        except ValueError:
+            os.unlink(path)
+            raise
+        # Readable only by owner and group
+        try:
+            os.chmod(path, 0o640)
+        except Exception:
+            pass  # Permissions may not work on all systems during development
+        return written, digest.hexdigest()
+
+    def put_text(self, key, content):
+        """
+        Atomically replace the object with text content
+
+        Writes to a temp file in the same directory and os.replace()s
+        it over the target, so readers never see a torn write.
+
+        Returns:
+            sha256 hexdigest of the content
+        """
+        path = self._path(key)
+        fd, tmp_path = tempfile.mkstemp(
+            dir=os.path.dirname(path), prefix='.pb_', suffix='.tmp'
+        )
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                f.write(content)
+            os.chmod(tmp_path, 0o640)
+            os.replace(tmp_path, path)
+        except OSError:
+            try:
+                os.unlink(tmp_path)
+            except FileNotFoundError:
+                pass
+            raise
+        return hashlib.sha256(content.encode('utf-8')).hexdigest()
+
+    def get(self, key):
+        """Readable binary file object; raises FileNotFoundError"""
+        return open(self._path(key), 'rb')
+
+    def delete(self, key):
+        """Remove the object; already-gone is not an error"""
+        try:
+            os.remove(self._path(key))
+        except FileNotFoundError:
+            pass
+
+    def mtime_ns(self, key):
+        """Modification time in ns, or None when the object is gone"""
+        try:
+            return os.stat(self._path(key)).st_mtime_ns
+        except FileNotFoundError:
+            return None
+
+
+class S3Storage:
+    """
+    Playbook files in S3 (requires the optional boto3 dependency)
+
+    Lets multiple API replicas share one playbook store. Job execution
+    still needs files on the worker's disk, so this backend is for
+    API-tier scale-out; workers keep using local storage.
+    """
+
+    def __init__(self, bucket):
+        if boto3 is None:
+            raise RuntimeError(
+                'boto3 is required for PLAYBOOK_STORAGE_BACKEND=s3'
+            )
+        self.bucket = bucket
+        self.client = boto3.client('s3')
+
+    def put(self, key, stream, max_bytes=None):
+        # Cap and hash while spooling locally, then hand the spool to
+        # boto3's managed (multipart-capable) upload
+        written = 0
+        digest = hashlib.sha256()
+        with tempfile.SpooledTemporaryFile(max_size=_CHUNK_SIZE * 16) as spool:
+            while chunk := stream.read(_CHUNK_SIZE):
+                written += len(chunk)
+                if max_bytes is not None and written > max_bytes:
+                    raise ValueError(
+                        f"File exceeds maximum size of {max_bytes} bytes"
+                    )
+                spool.write(chunk)
+                digest.update(chunk)
+            spool.seek(0)
+            self.client.upload_fileobj(spool, self.bucket, key)
+        return written, digest.hexdigest()
+
+    def put_text(self, key, content):
+        body = content.encode('utf-8')
+        self.client.put_object(Bucket=self.bucket, Key=key, Body=body)
+        return hashlib.sha256(body).hexdigest()
+
+    def get(self, key):
+        try:
+            return self.client.get_object(Bucket=self.bucket, Key=key)['Body']
+        except self.client.exceptions.NoSuchKey:
+            raise FileNotFoundError(key)
+
+    def delete(self, key):
+        self.client.delete_object(Bucket=self.bucket, Key=key)
+
+    def mtime_ns(self, key):
+        # No cheap local stat; integrity checks fall back to hashing
+        return None
+
+
+@lru_cache(maxsize=1)
+def get_storage():
+    """
+    Build the configured storage backend once per process
+
+    Returns:
+        LocalStorage or S3Storage per PLAYBOOK_STORAGE_BACKEND
+    """
+    config = get_config()
+    if getattr(config, 'PLAYBOOK_STORAGE_BACKEND', 'local') == 's3':
+        return S3Storage(config.PLAYBOOK_S3_BUCKET)
+    return LocalStorage(config.UPLOAD_FOLDER)
@@ -175,6 +175,61 @@ def execute_playbook_task(self, job_id):
             pass
 
 
+@celery.task(name='app.tasks.record_login_audit')
+def record_login_audit(user_id, username, ip_address=None, user_agent=None):
+    """
+    Record a successful login audit entry off the request path
+
+    Args:
+        user_id: Authenticated user ID
+        username: Username used to log in
+        ip_address: Client IP
+        user_agent: Client user agent
+    """
+    from app.models import AuditLog
+
+    audit_log = AuditLog(
+        user_id=user_id,
+        action='LOGIN',
+        resource_type='user',
+        resource_id=user_id,
+        details={'username': username},
+        ip_address=ip_address,
+        user_agent=user_agent
+    )
+    db.session.add(audit_log)
+    db.session.commit()
+
+
+@celery.task(name='app.tasks.refresh_server_metrics')
+def refresh_server_metrics(server_ids=None):
+    """
+    Refresh server metrics off the request path
+
+    Args:
+        server_ids: Optional list of server IDs; all active servers
+            when omitted
+
+    Returns:
+        Dictionary of hostname -> metrics
+    """
+    from app.api import bump_cache_version
+    from app.models import Server
+    from app.services.monitor_service import ServerMonitor
+
+    if server_ids:
+        servers = Server.query.filter(
+            Server.id.in_(server_ids),
+            Server.is_active.is_(True)
+        ).all()
+        results = ServerMonitor.update_servers(servers)
+    else:
+        results = ServerMonitor.update_all_servers()
+
+    bump_cache_version('servers')
+    return results
+
+
 @celery.task(name='app.tasks.cleanup_old_logs')
 def cleanup_old_logs():
     """
@@ -186,15 +241,33 @@ def cleanup_old_logs():
     """
     from app.models import JobLog
     from datetime import timedelta
-    
+    from sqlalchemy import func
+
     try:
         # Delete logs older than 90 days
         cutoff_date = datetime.utcnow() - timedelta(days=90)
-        
+
+        # Count the doomed rows per job first so the denormalized
+        # Job.log_count can be decremented in the same transaction as
+        # the delete; new log lines carry current timestamps, so none
+        # can slip between the count and the delete
+        doomed = db.session.query(
+            JobLog.job_id, func.count()
+        ).filter(
+            JobLog.timestamp < cutoff_date
+        ).group_by(JobLog.job_id).all()
+
         deleted_count = JobLog.query.filter(
             JobLog.timestamp < cutoff_date
-        ).delete()
-        
+        ).delete(synchronize_session=False)
+
+        for job_id, n in doomed:
+            db.session.execute(
+                Job.__table__.update()
+                .where(Job.id == job_id)
+                .values(log_count=func.greatest(Job.log_count - n, 0))
+            )
+
         db.session.commit()
         
         return {
@@ -3,12 +3,15 @@ Development Server for Windows Testing
 Minimal Flask server that handles auth without ansible_runner
 USE ONLY FOR TESTING LOGIN/UI - NO JOB EXECUTION
 """
-from flask import Flask, request, jsonify
+from flask import Flask, Response, request, jsonify
 from flask_cors import CORS
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
+import contextlib
+import hashlib
+import threading
 import jwt
-import mysql.connector
-from mysql.connector import Error
+from cachetools import TTLCache
+from mysql.connector import Error, pooling
 import os
 from dotenv import load_dotenv
 import bcrypt
@@ -27,29 +30,92 @@ DB_CONFIG = {
     'database': 'infra_automation'
 }
 
+# Connection pool: reuse the TCP + MySQL auth handshake across
+# requests instead of paying it on every login/me call. close() on a
+# pooled connection returns it to the pool. Built lazily on first use
+# so a MySQL that comes up after this server does still gets a pool.
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def _get_pool():
+    """Build the pool on first use, retrying later if MySQL was down"""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                try:
+                    _pool = pooling.MySQLConnectionPool(
+                        pool_name='dev', pool_size=10, **DB_CONFIG)
+                except Error as e:
+                    print(f"Database pool init error: {e}")
+    return _pool
+
+# Token constants resolved once instead of per request; a dedicated
+# PyJWT instance also skips re-resolving decode options on every call
+_JWT = jwt.PyJWT()
+_JWT_ALGO = 'HS256'
+_JWT_SECRET = app.config['SECRET_KEY']
+_ACCESS_TTL = timedelta(hours=1)
+_REFRESH_TTL = timedelta(days=30)
+
+# Column orders for the tuple-returning cursors below
+_LOGIN_COLS = ('id', 'username', 'email', 'role', 'password_hash')
+_ME_COLS = ('id', 'username', 'email', 'role')
+
+# The mock list/statistics endpoints always answer the same thing, so
+# the JSON is rendered once at import instead of per request
+_EMPTY_PAGE_BYTES = b'{"items":[],"total":0,"page":1,"per_page":20,"pages":0}'
+_EMPTY_STATS_BYTES = (b'{"total_jobs":0,"pending":0,"running":0,'
+                      b'"completed":0,"failed":0,"success_rate":0.0}')
+
 def get_db_connection():
-    """Get MySQL database connection"""
+    """Get a MySQL connection from the pool"""
+    pool = _get_pool()
+    if pool is None:
+        return None
     try:
-        conn = mysql.connector.connect(**DB_CONFIG)
-        return conn
+        return pool.get_connection()
     except Error as e:
         print(f"Database connection error: {e}")
         return None
 
+# Repeated identical login attempts (retry storms, misconfigured
+# health checks) short-circuit to a dict hit for 5s instead of paying
+# bcrypt's ~100ms per call. Keys are digests; no plaintext is stored.
+_login_cache = TTLCache(maxsize=1024, ttl=5)
+_login_cache_lock = threading.Lock()
+
+# /api/auth/me is polled by the SPA every few seconds; a 30s TTL
+# turns most of those calls into a dict hit instead of a SELECT
+_user_cache = TTLCache(maxsize=1024, ttl=30)
+_user_cache_lock = threading.Lock()
+
 def verify_password(stored_password, provided_password):
-    """Simple password verification"""
+    """Password verification with a short-lived result cache"""
+    key = hashlib.sha256(
+        f"{stored_password}:{provided_password}".encode('utf-8')
+    ).digest()
+    with _login_cache_lock:
+        cached = _login_cache.get(key)
+    if cached is not None:
+        return cached
     try:
-        return bcrypt.checkpw(provided_password.encode('utf-8'), stored_password.encode('utf-8'))
+        result = bcrypt.checkpw(provided_password.encode('utf-8'),
+                                stored_password.encode('utf-8'))
     except Exception as e:
         print(f"Password verification error: {e}")
         return False
+    with _login_cache_lock:
+        _login_cache[key] = result
+    return result
 
 @app.route('/api/health', methods=['GET'])
 def health():
     """Health check endpoint"""
     return jsonify({
         'status': 'healthy',
-        'timestamp': datetime.utcnow().isoformat(),
+        'timestamp': datetime.now(timezone.utc).isoformat(),
         'mode': 'DEVELOPMENT',
         'warning': 'Mock server - login only, no job execution'
     })
@@ -69,59 +135,61 @@ def login():
         return jsonify({'error': 'Database connection failed'}), 500
     
     try:
-        cursor = conn.cursor(dictionary=True)
-        cursor.execute(
-            "SELECT id, username, email, role, password_hash FROM users WHERE username = %s",
-            (username,)
-        )
-        user = cursor.fetchone()
-        
-        if not user:
-            return jsonify({'error': 'Invalid credentials'}), 401
-        
-        # Verify password
-        if not verify_password(user['password_hash'], password):
-            return jsonify({'error': 'Invalid credentials'}), 401
-        
-        # Generate JWT tokens
-        access_token = jwt.encode(
-            {
-                'user_id': user['id'],
-                'username': user['username'],
-                'role': user['role'],
-                'exp': datetime.utcnow() + timedelta(hours=1)
-            },
-            app.config['SECRET_KEY'],
-            algorithm='HS256'
-        )
-        
-        refresh_token = jwt.encode(
-            {
-                'user_id': user['id'],
-                'exp': datetime.utcnow() + timedelta(days=30)
-            },
-            app.config['SECRET_KEY'],
-            algorithm='HS256'
-        )
-        
-        return jsonify({
-            'access_token': access_token,
-            'refresh_token': refresh_token,
-            'user': {
-                'id': user['id'],
-                'username': user['username'],
-                'email': user['email'],
-                'role': user['role']
-            }
-        })
-        
+        # closing() returns the connection to the pool on exit. Plain
+        # parameterized execute: a prepared cursor would be deallocated
+        # on close, so per-request it only adds a PREPARE round trip.
+        with contextlib.closing(conn):
+            with contextlib.closing(conn.cursor()) as cursor:
+                cursor.execute(
+                    "SELECT id, username, email, role, password_hash FROM users WHERE username = %s",
+                    (username,)
+                )
+                row = cursor.fetchone()
     except Error as e:
         print(f"Database error: {e}")
         return jsonify({'error': 'Database error'}), 500
-    finally:
-        if conn.is_connected():
-            cursor.close()
-            conn.close()
+
+    if not row:
+        return jsonify({'error': 'Invalid credentials'}), 401
+
+    user = dict(zip(_LOGIN_COLS, row))
+
+    # Verify password
+    if not verify_password(user['password_hash'], password):
+        return jsonify({'error': 'Invalid credentials'}), 401
+
+    # Generate JWT tokens
+    now = datetime.now(timezone.utc)
+    access_token = _JWT.encode(
+        {
+            'user_id': user['id'],
+            'username': user['username'],
+            'role': user['role'],
+            'exp': now + _ACCESS_TTL
+        },
+        _JWT_SECRET,
+        algorithm=_JWT_ALGO
+    )
+
+    refresh_token = _JWT.encode(
+        {
+            'user_id': user['id'],
+            'exp': now + _REFRESH_TTL
+        },
+        _JWT_SECRET,
+        algorithm=_JWT_ALGO
+    )
+
+    return jsonify({
+        'access_token': access_token,
+        'refresh_token': refresh_token,
+        'user': {
+            'id': user['id'],
+            'username': user['username'],
+            'email': user['email'],
+            'role': user['role']
+        }
+    })
 
 @app.route('/api/auth/me', methods=['GET'])
 def get_current_user():
@@ -133,78 +201,68 @@ def get_current_user():
     token = auth_header.split(' ')[1]
     
     try:
-        payload = jwt.decode(token, app.config['SECRET_KEY'], algorithms=['HS256'])
-        user_id = payload['user_id']
-        
-        conn = get_db_connection()
-        if not conn:
-            return jsonify({'error': 'Database connection failed'}), 500
-        
-        cursor = conn.cursor(dictionary=True)
-        cursor.execute(
-            "SELECT id, username, email, role FROM users WHERE id = %s",
-            (user_id,)
-        )
-        user = cursor.fetchone()
-        
-        if not user:
-            return jsonify({'error': 'User not found'}), 404
-        
-        return jsonify(user)
-        
+        payload = _JWT.decode(token, _JWT_SECRET, algorithms=[_JWT_ALGO],
+                              options={'require': ['exp']})
     except jwt.ExpiredSignatureError:
         return jsonify({'error': 'Token expired'}), 401
     except jwt.InvalidTokenError:
         return jsonify({'error': 'Invalid token'}), 401
-    finally:
-        if conn and conn.is_connected():
-            cursor.close()
-            conn.close()
+
+    user_id = payload['user_id']
+
+    with _user_cache_lock:
+        user = _user_cache.get(user_id)
+    if user is not None:
+        return jsonify(user)
+
+    conn = get_db_connection()
+    if not conn:
+        return jsonify({'error': 'Database connection failed'}), 500
+
+    try:
+        # closing() returns the connection to the pool on exit. Plain
+        # parameterized execute: a prepared cursor would be deallocated
+        # on close, so per-request it only adds a PREPARE round trip.
+        with contextlib.closing(conn):
+            with contextlib.closing(conn.cursor()) as cursor:
+                cursor.execute(
+                    "SELECT id, username, email, role FROM users WHERE id = %s",
+                    (user_id,)
+                )
+                row = cursor.fetchone()
+    except Error as e:
+        print(f"Database error: {e}")
+        return jsonify({'error': 'Database error'}), 500
+
+    if not row:
+        return jsonify({'error': 'User not found'}), 404
+
+    user = dict(zip(_ME_COLS, row))
+
+    with _user_cache_lock:
+        _user_cache[user_id] = user
+
+    return jsonify(user)
 
 @app.route('/api/servers', methods=['GET'])
 def get_servers():
     """Mock servers endpoint"""
-    return jsonify({
-        'items': [],
-        'total': 0,
-        'page': 1,
-        'per_page': 20,
-        'pages': 0
-    })
+    return Response(_EMPTY_PAGE_BYTES, mimetype='application/json')
 
 @app.route('/api/playbooks', methods=['GET'])
 def get_playbooks():
     """Mock playbooks endpoint"""
-    return jsonify({
-        'items': [],
-        'total': 0,
-        'page': 1,
-        'per_page': 20,
-        'pages': 0
-    })
+    return Response(_EMPTY_PAGE_BYTES, mimetype='application/json')
 
 @app.route('/api/jobs', methods=['GET'])
 def get_jobs():
     """Mock jobs endpoint"""
-    return jsonify({
-        'items': [],
-        'total': 0,
-        'page': 1,
-        'per_page': 20,
-        'pages': 0
-    })
+    return Response(_EMPTY_PAGE_BYTES, mimetype='application/json')
 
 @app.route('/api/jobs/statistics', methods=['GET'])
 def get_job_statistics():
     """Mock job statistics endpoint"""
-    return jsonify({
-        'total_jobs': 0,
-        'pending': 0,
-        'running': 0,
-        'completed': 0,
-        'failed': 0,
-        'success_rate': 0.0
-    })
+    return Response(_EMPTY_STATS_BYTES, mimetype='application/json')
 
 if __name__ == '__main__':
     print("\n" + "="*60)
@@ -0,0 +1,39 @@
+"""
+Gunicorn Configuration
+Production WSGI server settings; start with:
+    gunicorn -c gunicorn_conf.py run:app
+
+run.py keeps app.run() behind __main__ for local development only.
+"""
+import multiprocessing
+
+# Workload is request-concurrency-bound: workers x threads concurrent
+# requests instead of the dev server's one at a time
+workers = 2 * multiprocessing.cpu_count() + 1
+threads = 4
+worker_class = 'gthread'
+timeout = 120
+
+# Recycle workers periodically to bound any slow leaks; the jitter
+# keeps them from all restarting at once
+max_requests = 1000
+max_requests_jitter = 100
+
+# Import the app once in the master so workers fork with warm code
+preload_app = True
+
+
+def post_fork(server, worker):
+    """Reset resources that must not be shared across fork"""
+    from run import app
+    from app.extensions import db
+    from app.services.audit_service import audit_writer
+
+    # Pooled DB connections inherited from the master would be shared
+    # sockets between workers; drop them so each worker opens its own
+    with app.app_context():
+        db.engine.dispose()
+
+    # Threads do not survive fork; bring the audit writer back up in
+    # this worker
+    audit_writer.start(app)
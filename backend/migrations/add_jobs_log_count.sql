@@ -0,0 +1,13 @@
+-- Migration: Add denormalized log counter to jobs
+-- Date: 2026-08-26
+-- Description: Add log_count so the logs endpoints read the total in
+-- O(1) instead of COUNT(*) over job_logs on every poll. Backfills from
+-- the existing rows.
+
+ALTER TABLE jobs
+ADD COLUMN log_count INT NOT NULL DEFAULT 0 COMMENT 'Number of job_logs rows';
+
+UPDATE jobs j
+SET j.log_count = (
+    SELECT COUNT(*) FROM job_logs l WHERE l.job_id = j.id
+);
@@ -0,0 +1,7 @@
+-- Migration: Add composite index for user-filtered job listings
+-- Date: 2026-08-26
+-- Description: Add (user_id, created_at) index so listing a user's jobs
+-- ordered by newest first is an index-ordered scan instead of a filter
+-- plus filesort
+
+CREATE INDEX idx_job_user_created ON jobs (user_id, created_at);
@@ -0,0 +1,7 @@
+-- Migration: Add cached file mtime to playbooks table
+-- Date: 2026-08-26
+-- Description: Add file_mtime column so integrity checks can skip re-hashing
+-- unchanged files with a single stat() comparison
+
+ALTER TABLE playbooks
+ADD COLUMN file_mtime BIGINT NULL COMMENT 'st_mtime_ns of file at last hash';
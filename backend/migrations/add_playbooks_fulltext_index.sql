@@ -0,0 +1,8 @@
+-- Migration: Add FULLTEXT index for playbook search
+-- Date: 2026-08-26
+-- Description: The search filter previously ran %term% LIKE scans over
+-- name and description, which cannot use a btree. A FULLTEXT index lets
+-- the service issue MATCH ... AGAINST word-prefix probes instead.
+
+ALTER TABLE playbooks
+ADD FULLTEXT INDEX ftx_playbook_name_description (name, description);
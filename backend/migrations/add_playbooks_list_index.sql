@@ -0,0 +1,8 @@
+-- Migration: Add composite index for the playbook listing
+-- Date: 2026-08-26
+-- Description: Add (is_active, created_at DESC, id DESC) so the default
+-- active listing and the keyset cursor path read rows in index order
+-- instead of filtering and filesorting.
+
+CREATE INDEX idx_playbook_active_created_id
+ON playbooks (is_active, created_at DESC, id DESC);
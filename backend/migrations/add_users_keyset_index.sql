@@ -0,0 +1,7 @@
+-- Migration: Add composite index for users keyset pagination
+-- Date: 2026-08-26
+-- Description: Add (created_at, id) index so the users listing can seek
+-- directly to a cursor position instead of scanning and discarding
+-- OFFSET rows
+
+CREATE INDEX idx_user_created_id ON users (created_at, id);
@@ -0,0 +1,8 @@
+-- Migration: Add covering index for the filtered users listing
+-- Date: 2026-08-26
+-- Description: Add (role, is_active, created_at DESC) index so role and
+-- is_active filters ordered by newest first are served directly from
+-- the index on MySQL 8 instead of a scan plus filesort
+
+CREATE INDEX idx_user_role_active_created
+    ON users (role, is_active, created_at DESC);
@@ -0,0 +1,19 @@
+-- Migration: Cascade user deletes in the database
+-- Date: 2026-08-26
+-- Description: Switch the user-owned foreign keys from ON DELETE RESTRICT
+-- to ON DELETE CASCADE so deleting a user is a single DELETE statement
+-- handled by InnoDB, instead of the ORM loading every job/ticket and
+-- issuing per-row deletes. Tickets also cascade from jobs so a cascaded
+-- job delete is not blocked by its tickets. audit_logs keeps SET NULL.
+
+ALTER TABLE jobs DROP FOREIGN KEY fk_jobs_user;
+ALTER TABLE jobs ADD CONSTRAINT fk_jobs_user FOREIGN KEY (user_id)
+    REFERENCES users(id) ON DELETE CASCADE;
+
+ALTER TABLE tickets DROP FOREIGN KEY fk_tickets_user;
+ALTER TABLE tickets ADD CONSTRAINT fk_tickets_user FOREIGN KEY (created_by)
+    REFERENCES users(id) ON DELETE CASCADE;
+
+ALTER TABLE tickets DROP FOREIGN KEY fk_tickets_job;
+ALTER TABLE tickets ADD CONSTRAINT fk_tickets_job FOREIGN KEY (job_id)
+    REFERENCES jobs(id) ON DELETE CASCADE;
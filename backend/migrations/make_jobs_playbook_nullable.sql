@@ -0,0 +1,18 @@
+-- Migration: Allow jobs to outlive their playbook
+-- Date: 2026-08-26
+-- Description: hard_delete_playbook detaches jobs with a bulk
+-- UPDATE ... SET playbook_id = NULL, which the NOT NULL constraint on
+-- jobs.playbook_id rejected. Make the column nullable and let the FK
+-- SET NULL on delete so the single bulk statement (and any future
+-- DB-level delete) succeeds.
+
+ALTER TABLE jobs
+DROP FOREIGN KEY fk_jobs_playbook;
+
+ALTER TABLE jobs
+MODIFY COLUMN playbook_id INT NULL;
+
+ALTER TABLE jobs
+ADD CONSTRAINT fk_jobs_playbook
+    FOREIGN KEY (playbook_id) REFERENCES playbooks(id)
+    ON DELETE SET NULL;